@@ -0,0 +1,6 @@
+"""
+Offline benchmarks and consistency checks for the board and agent. These
+are development tools only: run each module from the repository root, e.g.
+
+    python -m benchmarks.board
+"""
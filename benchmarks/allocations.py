@@ -0,0 +1,161 @@
+"""
+Measure memory allocated per node by search, over random opening positions
+searched to a fixed depth, with tracemalloc and the garbage collector
+paused while measuring.
+
+Each operation the search loop performs at a node is measured on its own:
+making and unmaking moves, evaluating (singly and in batches), ordering
+moves, and finding keys for, probing and storing in the transposition
+table. What an operation allocates is taken as the peak traced memory
+during it, above that when it started, so allocations it frees again
+before returning are counted too. (Memory freed and allocated again within
+one operation is only counted once, so this is still a lower bound.)
+Operations called from within another are counted as part of it; the
+search's own temporaries, outside these operations, aren't counted.
+
+Also shown, per node, is the memory still held (retained) after the whole
+search, and the peak memory in use during the search above that at the
+root.
+
+Usage: python -m benchmarks.allocations [positions per size]
+"""
+
+import gc
+import sys
+import random
+import tracemalloc
+
+from slips_and_falls.player import Player
+from slips_and_falls.final_tracker import FinalTracker
+from benchmarks.search import opening
+
+_SIZES = range(5, 16, 2)
+
+# Fixed search depth per board size (3 if not listed)
+_DEPTHS = {5: 4, 7: 4}
+
+_COLUMNS = ("make", "unmake", "evaluate", "order", "table")
+
+
+class AllocationCounter:
+    """
+    Totals of the bytes allocated by each column's operations (make,
+    unmake, evaluate, order and table), and the peak traced memory over
+    all of them.
+    """
+    def __init__(self):
+        self.totals = dict.fromkeys(_COLUMNS, 0)
+        self.peak = 0
+        self.active = False
+
+    def call(self, column, method, *args):
+        if self.active:
+            return method(*args)
+        self.active = True
+        # resetting loses the peak so far, so keep it first
+        start, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        tracemalloc.reset_peak()
+        try:
+            return method(*args)
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peak = max(self.peak, peak)
+            self.totals[column] += peak - start
+            self.active = False
+
+
+def _measured(column, method):
+    def measured(self, *args):
+        if self.counter is None:
+            return method(self, *args)
+        return self.counter.call(column, method, self, *args)
+    return measured
+
+
+class CountingTracker(FinalTracker):
+    """
+    Tracker whose search operations are measured by its counter, if set.
+    """
+    counter = None
+
+    make_move = _measured("make", FinalTracker.make_move)
+    undo_last_move = _measured("unmake", FinalTracker.undo_last_move)
+    evaluation_wrapper = _measured(
+        "evaluate", FinalTracker.evaluation_wrapper)
+    frontier_values = _measured("evaluate", FinalTracker.frontier_values)
+    order_moves = _measured("order", FinalTracker.order_moves)
+    tt_key = _measured("table", FinalTracker.tt_key)
+
+
+class CountingPlayer(Player):
+    tracker_class = CountingTracker
+
+
+def player_at(n, actions):
+    """
+    A CountingPlayer in the position after actions.
+    """
+    player = CountingPlayer("red", n)
+    for token, action in actions:
+        player.turn(token, action)
+    return player
+
+
+def search_allocations(n, actions, depth):
+    """
+    Bytes allocated by each column's operations during a fixed depth search
+    of the position, the number of nodes searched, the bytes retained after
+    it, and its peak memory above the root.
+    """
+    board = player_at(n, actions).tracking_board
+    board.new_search()
+    counter = AllocationCounter()
+    table = board.transtbl
+    probe, store = table.probe, table.store
+    table.probe = lambda *args: counter.call("table", probe, *args)
+    table.store = lambda *args: counter.call("table", store, *args)
+    gc.collect()
+    gc.disable()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    board.counter = counter
+    board.search_root(depth)
+    board.counter = None
+    after, peak = tracemalloc.get_traced_memory()
+    gc.enable()
+    peak = max(peak, counter.peak) - before
+    return counter.totals, board.nodes, after - before, peak
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = random.Random(0)
+    tracemalloc.start()
+    print("bytes allocated per node by each operation, bytes retained per "
+        "node after search, and search's peak memory")
+    print(f"{'n':>3} {'depth':>5} " +
+        " ".join(f"{column:>8}" for column in _COLUMNS) +
+        f" {'total':>8} {'retained':>9} {'peak':>8}")
+    for n in _SIZES:
+        depth = _DEPTHS.get(n, 3)
+        totals = dict.fromkeys(_COLUMNS, 0)
+        nodes = retained = peak = 0
+        for _ in range(num_positions):
+            actions = opening(n, rng)
+            allocated, searched, held, high = search_allocations(
+                n, actions, depth)
+            for column in _COLUMNS:
+                totals[column] += allocated[column]
+            nodes += searched
+            retained += held
+            peak += high
+        print(f"{n:>3} {depth:>5} " +
+            " ".join(f"{totals[column] / nodes:>8.1f}"
+                for column in _COLUMNS) +
+            f" {sum(totals.values()) / nodes:>8.1f} "
+            f"{retained / nodes:>9.1f} {peak / num_positions / 1024:>6.0f}kB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Check that referee.bitboard.BitBoard behaves identically to the NumPy
+referee.board.Board over random games (including captures and STEAL), then
+compare placements per second for both backends.
+
+Usage: python -m benchmarks.board [games per size]
+"""
+
+import sys
+import random
+from time import perf_counter as timer
+
+from referee.board import Board
+from referee.bitboard import BitBoard
+
+_SIZES = range(3, 16)
+_COLOURS = ("red", "blue")
+
+
+def random_game(n, rng, max_turns=None):
+    """
+    Generate a random sequence of (token, coord) placements on an n board
+    (coord is None for a STEAL). Captured cells become playable again.
+    """
+    board = BitBoard(n)
+    empty = {(r, q) for r in range(n) for q in range(n)}
+    turns = []
+    for turn in range(max_turns or 3 * n * n):
+        if not empty:
+            break
+        if turn == 1 and rng.random() < 0.5:
+            board.swap()
+            empty = {(r, q) for r in range(n) for q in range(n)
+                if not board.is_occupied((r, q))}
+            turns.append((_COLOURS[turn % 2], None))
+            continue
+        coord = rng.choice(sorted(empty))
+        token = _COLOURS[turn % 2]
+        empty.discard(coord)
+        empty.update(board.place(token, coord))
+        turns.append((token, coord))
+    return turns
+
+
+def check_equivalence(n, rng):
+    """
+    Replay a random game on both backends, asserting they agree on every
+    cell, capture and connected group after each turn.
+    """
+    reference, bitboard = Board(n), BitBoard(n)
+    cells = [(r, q) for r in range(n) for q in range(n)]
+    for token, coord in random_game(n, rng):
+        if coord is None:
+            reference.swap()
+            bitboard.swap()
+        else:
+            expected = reference.place(token, coord)
+            actual = bitboard.place(token, coord)
+            assert sorted(expected) == sorted(actual), (n, coord)
+        for cell in cells:
+            assert reference[cell] == bitboard[cell], (n, cell)
+            assert reference.is_occupied(cell) == bitboard.is_occupied(cell)
+        probe = rng.choice(cells)
+        assert (sorted(reference.connected_coords(probe)) ==
+            sorted(bitboard.connected_coords(probe))), (n, probe)
+        assert (sorted(reference._coord_neighbours(probe)) ==
+            sorted(bitboard._coord_neighbours(probe))), (n, probe)
+
+
+def placements_per_second(board_class, n, games):
+    """
+    Time replaying pre-generated games on the given board class.
+    """
+    placements = 0
+    elapsed = 0
+    for game in games:
+        board = board_class(n)
+        start = timer()
+        for token, coord in game:
+            if coord is None:
+                board.swap()
+            else:
+                board.place(token, coord)
+        elapsed += timer() - start
+        placements += len(game)
+    return placements / elapsed
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(0)
+    for n in _SIZES:
+        for _ in range(num_games):
+            check_equivalence(n, rng)
+    print(f"equivalence: ok ({num_games} games per size)")
+
+    print(f"{'n':>3} {'Board/s':>12} {'BitBoard/s':>12} {'speedup':>8}")
+    for n in _SIZES:
+        games = [random_game(n, rng) for _ in range(num_games)]
+        numpy_rate = placements_per_second(Board, n, games)
+        bit_rate = placements_per_second(BitBoard, n, games)
+        print(f"{n:>3} {numpy_rate:>12.0f} {bit_rate:>12.0f} "
+            f"{bit_rate / numpy_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Check the tracker's forced replies (from the bridge and edge template table
+in slips_and_falls.utils.bridges) against finding them directly from each
+cell's neighbours, after every move of random games with captures and
+steals. Then compare search with the table unused, with forced replies only
+ordered first, and with the other replies to intrusions pruned: nodes
+searched to a fixed depth, and depth reached by iterative deepening in a
+fixed time, over random opening positions.
+
+Usage: python -m benchmarks.bridges [positions per size] [seconds per search]
+"""
+
+import sys
+import random
+from time import perf_counter as timer
+
+from slips_and_falls.player import Player, PrunedPlayer
+from slips_and_falls.final_tracker import FinalTracker
+from slips_and_falls.utils.helper_functions import move_to_action
+from benchmarks.board import random_game
+from benchmarks.search import opening
+
+_SIZES = range(5, 14, 2)
+
+# Fixed search depth per board size (3 if not listed)
+_DEPTHS = {5: 4}
+
+_OPPONENT = {"red": "blue", "blue": "red"}
+
+
+def direct_replies(board):
+    """
+    Forced replies found from scratch: after the opponent places at x, each
+    empty y such that some pair of the mover's tiles (or tile and edge)
+    have exactly x and y as their common neighbours.
+    """
+    if not board.ply or board._stack_move[board.ply - 1] == "STEAL":
+        return set()
+    x = board._stack_move[board.ply - 1]
+    player = _OPPONENT[board._stack_player[board.ply - 1]]
+    topo = board._topology
+    own = board._masks[player]
+    occupied = own | board._masks[_OPPONENT[player]]
+    neighbours = [set(cells) for cells in topo.neighbours]
+    replies = set()
+    for y in neighbours[x]:
+        if occupied >> y & 1:
+            continue
+        carrier = {x, y}
+        tiles = [a for a in neighbours[x] & neighbours[y] if own >> a & 1]
+        for i, a in enumerate(tiles):
+            for b in tiles[i + 1:]:
+                if neighbours[a] & neighbours[b] == carrier:
+                    replies.add(y)
+            for edge in (topo.start_masks[player], topo.end_masks[player]):
+                on_edge = {j for j in neighbours[a] if edge >> j & 1}
+                if not edge >> a & 1 and on_edge == carrier:
+                    replies.add(y)
+    return replies
+
+
+def check_replies(n, rng):
+    player = Player("red", n)
+    board = player.tracking_board
+    for token, coord in random_game(n, rng):
+        action = ("STEAL",) if coord is None else move_to_action(
+            coord[0] * n + coord[1], n)
+        player.turn(token, action)
+        assert set(board.forced_replies()) == direct_replies(board), (
+            n, board.ply)
+
+
+class UnusedTracker(FinalTracker):
+    """
+    Tracker which never finds forced replies, as before the table.
+    """
+    def forced_replies(self):
+        return []
+
+
+class UnusedPlayer(Player):
+    tracker_class = UnusedTracker
+
+
+def tracker(player_class, n, actions):
+    player = player_class("red", n)
+    for token, action in actions:
+        player.turn(token, action)
+    return player.tracking_board
+
+
+def fixed_depth(board, depth):
+    """
+    Nodes searched and time taken to search to depth.
+    """
+    start = timer()
+    board.new_search()
+    board.search_root(depth)
+    return board.nodes, timer() - start
+
+
+def fixed_time(board, seconds):
+    """
+    Depth reached by iterative deepening in the given time.
+    """
+    board.move_start = timer()
+    board.soft_deadline = board.move_start + seconds
+    board.hard_deadline = board.move_start + seconds
+    board.iterative_deepening()
+    return board.depth_reached
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    rng = random.Random(0)
+    for n in range(3, 12):
+        for _ in range(num_positions):
+            check_replies(n, rng)
+
+    variants = [
+        ("unused", UnusedPlayer),
+        ("ordered", Player),
+        ("pruned", PrunedPlayer),
+    ]
+    print(f"{'n':>3} {'depth':>5} " + " ".join(
+        f"{f'nodes ({name})':>16} {f'time ({name})':>15}"
+        for name, _ in variants) + " " + " ".join(
+        f"{f'depth ({name})':>16}" for name, _ in variants))
+    for n in _SIZES:
+        depth = _DEPTHS.get(n, 3)
+        nodes = [0] * len(variants)
+        times = [0] * len(variants)
+        reached = [0] * len(variants)
+        for _ in range(num_positions):
+            actions = opening(n, rng)
+            for i, (_, player_class) in enumerate(variants):
+                searched, elapsed = fixed_depth(
+                    tracker(player_class, n, actions), depth)
+                nodes[i] += searched
+                times[i] += elapsed
+                reached[i] += fixed_time(
+                    tracker(player_class, n, actions), seconds)
+        print(f"{n:>3} {depth:>5} " + " ".join(
+            f"{nodes[i]:>16} {times[i]:>14.2f}s" for i in range(len(variants))
+        ) + " " + " ".join(
+            f"{reached[i] / num_positions:>16.1f}"
+            for i in range(len(variants))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Check that the tracker's incrementally maintained candidate moves match the
+breadth-first search it replaces (from every occupied cell, through empty
+cells), after every move and undo of random games with captures and steals.
+Then compare the time taken to find candidates by search after every move
+against the upkeep of the counts.
+
+Usage: python -m benchmarks.candidates [games per size]
+"""
+
+import sys
+import random
+from queue import Queue
+from time import perf_counter as timer
+
+from slips_and_falls.player import Player
+from slips_and_falls.final_tracker import FinalTracker
+from benchmarks.board import random_game
+
+_SIZES = range(3, 16)
+
+_NEIGHBOUR_OFFSETS = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, -1), (-1, 1))
+
+
+def search_candidates(board):
+    """
+    Candidate moves as previously found at each root: empty cells reachable
+    within 2 steps (4 on n = 3) of an occupied cell through empty cells,
+    plus the empty short diagonal corners (other than on n = 3), as
+    indices.
+    """
+    n = board.n
+    coords = board._tables.coords
+    max_depth = 4 if n == 3 else 2
+    q = Queue(maxsize=n**2)
+    seen = set()
+    neighbours = set()
+    for tile in board.tiles["red"] | board.tiles["blue"]:
+        q.put((coords[tile], 0))
+        seen.add(coords[tile])
+    while not q.empty():
+        (x, y), depth = q.get()
+        for dx, dy in _NEIGHBOUR_OFFSETS:
+            nbr = x + dx, y + dy
+            if (depth < max_depth and nbr not in seen and
+                    0 <= nbr[0] < n and 0 <= nbr[1] < n and not board[nbr]):
+                seen.add(nbr)
+                neighbours.add(nbr)
+                if depth + 1 < max_depth:
+                    q.put((nbr, depth + 1))
+    if n != 3:
+        for corner in [(0, n - 1), (n - 1, 0)]:
+            if not board[corner]:
+                neighbours.add(corner)
+    return {r * n + q for r, q in neighbours}
+
+
+class TimedTracker(FinalTracker):
+    """
+    Tracker which totals the time spent updating candidate moves.
+    """
+    upkeep = 0
+
+    def occupy(self, i):
+        start = timer()
+        super().occupy(i)
+        self.upkeep += timer() - start
+
+    def vacate(self, i):
+        start = timer()
+        super().vacate(i)
+        self.upkeep += timer() - start
+
+
+class TimedPlayer(Player):
+    tracker_class = TimedTracker
+
+
+def check_candidates(n, rng):
+    """
+    Play a random game (with internal updates, as in search), checking
+    candidates after every move, then undo it all, checking again.
+    """
+    board = Player("red", n).tracking_board
+    for token, coord in random_game(n, rng):
+        move = "STEAL" if coord is None else coord[0] * n + coord[1]
+        board.make_move(token, move)
+        assert board.possible_moves == search_candidates(board), (n, coord)
+    while board.ply:
+        board.undo_last_move()
+        assert board.possible_moves == search_candidates(board), n
+
+
+def candidate_time(n, rng, games):
+    """
+    Time taken over random games to search for candidates after every move,
+    and to keep the counts up to date instead.
+    """
+    searched = incremental = 0
+    for _ in range(games):
+        board = TimedPlayer("red", n).tracking_board
+        for token, coord in random_game(n, rng):
+            board.make_move(
+                token, "STEAL" if coord is None else coord[0] * n + coord[1]
+            )
+            start = timer()
+            search_candidates(board)
+            searched += timer() - start
+        incremental += board.upkeep
+    return searched, incremental
+
+
+def main():
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = random.Random(0)
+    print(f"{'n':>3} {'search':>10} {'incremental':>12} {'speedup':>8}")
+    for n in _SIZES:
+        for _ in range(games):
+            check_candidates(n, rng)
+        searched, incremental = candidate_time(n, rng, games)
+        print(f"{n:>3} {searched:>9.3f}s {incremental:>11.3f}s "
+            f"{searched / incremental:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
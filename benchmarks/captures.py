@@ -0,0 +1,50 @@
+"""
+Micro-benchmark of referee.board.Board placements (which run capture
+detection) using the per-size capture tables, against the previous
+implementation that rebuilt and bounds-checked every pattern on each call.
+
+Usage: python -m benchmarks.captures [games per size]
+"""
+
+import sys
+import random
+
+from referee.board import Board, _ADD, _CAPTURE_PATTERNS, _SWAP_PLAYER
+from benchmarks.board import random_game, placements_per_second
+
+_SIZES = range(5, 16)
+
+
+class LegacyBoard(Board):
+    """
+    Board with the original (untabled) capture detection.
+    """
+    def _apply_captures(self, coord):
+        opp_type = self._data[coord]
+        mid_type = _SWAP_PLAYER[opp_type]
+        captured = set()
+        for pattern in _CAPTURE_PATTERNS:
+            coords = [_ADD(coord, s) for s in pattern]
+            if all(map(self.inside_bounds, coords)):
+                tokens = [self._data[coord] for coord in coords]
+                if tokens == [opp_type, mid_type, mid_type]:
+                    captured.update(coords[1:])
+        for coord in captured:
+            self[coord] = None
+        return list(captured)
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = random.Random(0)
+    print(f"{'n':>3} {'legacy/s':>10} {'tabled/s':>10} {'speedup':>8}")
+    for n in _SIZES:
+        games = [random_game(n, rng) for _ in range(num_games)]
+        legacy = placements_per_second(LegacyBoard, n, games)
+        tabled = placements_per_second(Board, n, games)
+        print(f"{n:>3} {legacy:>10.0f} {tabled:>10.0f} "
+            f"{tabled / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
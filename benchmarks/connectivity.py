@@ -0,0 +1,108 @@
+"""
+Check referee.connectivity.Connectivity against a full board search over
+random games (including captures, STEAL and undo), then compare the cost of
+a win check against the referee's previous connected_coords search.
+
+Usage: python -m benchmarks.connectivity [games per size]
+"""
+
+import sys
+import random
+from time import perf_counter as timer
+
+from referee.bitboard import BitBoard
+from referee.connectivity import Connectivity
+from benchmarks.board import random_game
+
+_SIZES = range(3, 16)
+_AXIS = {"red": 0, "blue": 1}
+
+
+def search_reach(board, token, from_start=True):
+    """
+    Reference for Connectivity.reach: search from each of token's edge
+    cells for the furthest row reached.
+    """
+    n = board.n
+    edge = 0 if from_start else n - 1
+    reach = 0
+    for i in range(n):
+        coord = (edge, i) if token == "red" else (i, edge)
+        if board[coord] == token:
+            for c in board.connected_coords(coord):
+                reach = max(reach, abs(c[_AXIS[token]] - edge) + 1)
+    return reach
+
+
+def search_connected(board, token):
+    """
+    Reference win check: search from each of token's start edge cells.
+    """
+    return search_reach(board, token) == board.n
+
+
+def check_connectivity(n, game, rng):
+    """
+    Replay a game, asserting Connectivity agrees with a full search after
+    every turn and after making/unmaking a random extra move.
+    """
+    board, connectivity = BitBoard(n), Connectivity(n)
+    for token, coord in game:
+        if coord is None:
+            board.swap()
+            connectivity.swap()
+        else:
+            connectivity.place(token, coord, board.place(token, coord))
+        for colour in _AXIS:
+            assert connectivity.connected(colour) == \
+                search_connected(board, colour), (n, coord)
+            for from_start in (True, False):
+                assert connectivity.reach(colour, from_start) == \
+                    search_reach(board, colour, from_start), (n, coord)
+
+        # Make and unmake a random move (as search would)
+        empty = [(r, q) for r in range(n) for q in range(n)
+            if not board.is_occupied((r, q))]
+        if empty:
+            probe = rng.choice(empty)
+            before = [connectivity.reach(c, s) for c in _AXIS
+                for s in (True, False)]
+            saved = board.digest()
+            connectivity.place(token, probe, board.place(token, probe))
+            connectivity.undo()
+            board._masks["red"], board._masks["blue"] = saved
+            assert before == [connectivity.reach(c, s) for c in _AXIS
+                for s in (True, False)]
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rng = random.Random(0)
+    for n in _SIZES:
+        for _ in range(num_games):
+            check_connectivity(n, random_game(n, rng), rng)
+    print(f"connectivity: ok ({num_games} games per size)")
+
+    print(f"{'n':>3} {'search/s':>10} {'union-find/s':>13}")
+    for n in _SIZES:
+        board, connectivity = BitBoard(n), Connectivity(n)
+        for token, coord in random_game(n, rng, max_turns=n * n):
+            if coord is None:
+                board.swap()
+                connectivity.swap()
+            else:
+                connectivity.place(token, coord, board.place(token, coord))
+        reps = 2000
+        start = timer()
+        for _ in range(reps):
+            search_connected(board, "red")
+        search_rate = reps / (timer() - start)
+        start = timer()
+        for _ in range(reps):
+            connectivity.connected("red")
+        uf_rate = reps / (timer() - start)
+        print(f"{n:>3} {search_rate:>10.0f} {uf_rate:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Check that each registered evaluation kernel (see
+slips_and_falls.utils.evaluation), and the weighted combinations matching
+the existing evaluation functions, agree with those functions in
+slips_and_falls.utils.heuristics over random positions. Then measure
+evaluations per second for every combination of kernels, and for the
+existing functions.
+
+Usage: python -m benchmarks.evaluation [positions per size]
+"""
+
+import sys
+import random
+from itertools import combinations
+from math import isclose
+from time import perf_counter as timer
+
+from slips_and_falls.utils import heuristics
+from slips_and_falls.utils.evaluation import WeightedEvaluation, kernel_names
+from benchmarks.frontier import position
+
+_SIZES = (5, 9, 15)
+
+# Existing evaluation functions, and the kernel weights matching them
+_EQUIVALENT = [
+    (heuristics.edge_branch_eval, {"edge_branch": 1}),
+    (heuristics.captures, {"captures": 1}),
+    (heuristics.axis_advantage, {"axis_advantage": 1}),
+    (heuristics.centre_advantage, {"centre_advantage": 1}),
+    (heuristics.edges_advantage, {"edges_advantage": 1}),
+    (heuristics.edge_branch_capture_eval,
+        {"edge_branch": 1, "captures": 1}),
+    (heuristics.edge_branch_capture_axis_eval,
+        {"edge_branch": 1, "captures": 1, "axis_advantage": 0.01}),
+    (heuristics.edge_branch_capture_edges_eval,
+        {"edge_branch": 1, "captures": 2, "edges_advantage": 0.1}),
+]
+
+
+def positions(n, rng, count):
+    """
+    Trackers in random positions, with a player to evaluate for.
+    """
+    boards = []
+    for _ in range(count):
+        player, to_move, _ = position(n, rng)
+        boards.append((player.tracking_board, to_move))
+    return boards
+
+
+def check_kernels(boards):
+    for function, weights in _EQUIVALENT:
+        evaluation = WeightedEvaluation(weights)
+        for board, player in boards:
+            for token in (player, "blue" if player == "red" else "red"):
+                expected = function(board, token)
+                actual = evaluation(board, token)
+                assert isclose(actual, expected, abs_tol=1e-9), (
+                    function.__name__, board.n, actual, expected)
+
+
+def evals_per_second(evaluate, boards, repeats):
+    start = timer()
+    for _ in range(repeats):
+        for board, player in boards:
+            evaluate(board, player)
+    return repeats * len(boards) / (timer() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(0)
+    boards = {n: positions(n, rng, count) for n in _SIZES}
+    for n in _SIZES:
+        check_kernels(boards[n])
+
+    names = kernel_names()
+    rows = [(" + ".join(combination),
+            WeightedEvaluation(dict.fromkeys(combination, 1)))
+        for size in range(1, len(names) + 1)
+        for combination in combinations(names, size)]
+    rows += [(f"{function.__name__} (old)", function)
+        for function, _ in _EQUIVALENT[2:]]
+    width = max(len(name) for name, _ in rows)
+    print(f"{'evaluations per second':<{width}} " +
+        " ".join(f"{f'n={n}':>9}" for n in _SIZES))
+    for name, evaluate in rows:
+        rates = [evals_per_second(evaluate, boards[n], 20) for n in _SIZES]
+        print(f"{name:<{width}} " +
+            " ".join(f"{rate:>9.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Check that evaluating all of a depth 1 node's children at once (see
+edge_branch_capture_children) gives the same values as making each move
+and calling edge_branch_capture_eval, over random positions. Then compare
+the time taken to evaluate a node's children each way, and the time taken
+by a fixed depth search with and without the batch evaluation.
+
+Usage: python -m benchmarks.frontier [positions per size]
+"""
+
+import sys
+import random
+from time import perf_counter as timer
+
+from slips_and_falls.player import Player
+from slips_and_falls.utils.helper_functions import move_to_action
+from benchmarks.board import random_game
+from benchmarks.search import opening
+
+_SIZES = range(3, 16, 2)
+
+# Fixed search depth per board size (3 if not listed)
+_DEPTHS = {5: 4, 7: 4}
+
+
+class SequentialPlayer(Player):
+    """
+    Player which evaluates each child of a depth 1 node separately.
+    """
+    evaluate_children = None
+
+
+def sequential_values(board, player, moves):
+    """
+    Values of each move for player, made and evaluated one at a time.
+    """
+    values = []
+    for move in moves:
+        board.make_move(player, move)
+        values.append(-board.evaluation_wrapper(
+            "blue" if player == "red" else "red"
+        ))
+        board.undo_last_move()
+    return values
+
+
+def position(n, rng):
+    """
+    A Player in a random position (which may include captures and steals),
+    the player to move, and the empty cells.
+    """
+    game = random_game(n, rng, max_turns=rng.randrange(1, n * n))
+    player = Player("red", n)
+    for token, coord in game:
+        move = "STEAL" if coord is None else coord[0] * n + coord[1]
+        player.turn(token, move_to_action(move, n))
+    board = player.tracking_board
+    occupied = board.tiles["red"] | board.tiles["blue"]
+    empty = [i for i in range(n * n) if i not in occupied]
+    return player, "red" if len(game) % 2 == 0 else "blue", empty
+
+
+def check_frontier(n, rng, positions):
+    """
+    Compare batch and sequential values of every empty cell, returning the
+    number of (non-final) positions checked.
+    """
+    checked = 0
+    for _ in range(positions):
+        player, to_move, moves = position(n, rng)
+        board = player.tracking_board
+        if board.game_over() or not moves:
+            continue
+        expected = sequential_values(board, to_move, moves)
+        actual = board.frontier_values(to_move, moves)
+        assert actual == expected, (n, moves, actual, expected)
+        checked += 1
+    return checked
+
+
+def frontier_time(n, rng, positions):
+    """
+    Total time taken to evaluate the candidate moves of positions one at
+    a time, and all at once.
+    """
+    sequential = batched = 0
+    for _ in range(positions):
+        player = Player("red", n)
+        actions = opening(n, rng)
+        for token, action in actions:
+            player.turn(token, action)
+        to_move = "red" if len(actions) % 2 == 0 else "blue"
+        board = player.tracking_board
+        moves = sorted(board.possible_moves)
+        start = timer()
+        sequential_values(board, to_move, moves)
+        sequential += timer() - start
+        start = timer()
+        board.frontier_values(to_move, moves)
+        batched += timer() - start
+    return sequential, batched
+
+
+def search_time(player_class, n, actions, depth):
+    """
+    Time taken to search the position after actions.
+    """
+    player = player_class("red", n)
+    for token, action in actions:
+        player.turn(token, action)
+    board = player.tracking_board
+    board.new_search()
+    start = timer()
+    board.search_root(depth)
+    return timer() - start
+
+
+def main():
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rng = random.Random(0)
+    print(f"{'n':>3} {'checked':>8} {'children (seq)':>15} "
+        f"{'children (batch)':>17} {'depth':>6} {'search (seq)':>13} "
+        f"{'search (batch)':>15}")
+    for n in _SIZES:
+        checked = check_frontier(n, rng, positions)
+        sequential, batched = frontier_time(n, rng, positions)
+        depth = _DEPTHS.get(n, 3)
+        searches = [0, 0]
+        for _ in range(max(1, positions // 4)):
+            actions = opening(n, rng)
+            searches[0] += search_time(SequentialPlayer, n, actions, depth)
+            searches[1] += search_time(Player, n, actions, depth)
+        print(f"{n:>3} {checked:>8} {sequential * 1e3:>13.2f}ms "
+            f"{batched * 1e3:>15.2f}ms {depth:>6} {searches[0]:>12.2f}s "
+            f"{searches[1]:>14.2f}s")
+
+
+if __name__ == "__main__":
+    main()
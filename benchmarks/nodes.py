@@ -0,0 +1,37 @@
+"""
+Measure search speed in nodes per second: fixed depth searches from random
+opening positions on each board size.
+
+Usage: python -m benchmarks.nodes [positions per size]
+"""
+
+import sys
+import random
+
+from slips_and_falls.player import Player
+from benchmarks.search import opening, search_nodes
+
+_SIZES = range(5, 16, 2)
+
+# Fixed search depth per board size (3 if not listed)
+_DEPTHS = {5: 4, 7: 4}
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = random.Random(0)
+    print(f"{'n':>3} {'depth':>5} {'nodes':>9} {'time':>8} {'nodes/s':>9}")
+    for n in _SIZES:
+        depth = _DEPTHS.get(n, 3)
+        nodes = time = 0
+        for _ in range(num_positions):
+            actions = opening(n, rng)
+            result = search_nodes(Player, n, actions, depth)
+            nodes += result[0]
+            time += result[1]
+        print(f"{n:>3} {depth:>5} {nodes:>9} {time:>7.2f}s "
+            f"{nodes / time:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
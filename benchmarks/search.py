@@ -0,0 +1,88 @@
+"""
+Compare search node counts with full move ordering (transposition table
+move, killer moves and history heuristic) against the previous ordering by
+number of occupied neighbours alone, and against principal variation
+search (with full ordering), over random opening positions.
+
+Usage: python -m benchmarks.search [positions per size]
+"""
+
+import sys
+import random
+from time import perf_counter as timer
+
+from slips_and_falls.player import Player, PVSPlayer
+from slips_and_falls.final_tracker import FinalTracker
+from slips_and_falls.utils.helper_functions import move_to_action
+from benchmarks.board import random_game
+
+_SIZES = range(5, 12)
+
+# Fixed search depth per board size (3 if not listed)
+_DEPTHS = {5: 4, 6: 4}
+
+
+class NeighbourOrderTracker(FinalTracker):
+    """
+    Tracker whose search orders moves by occupied neighbours only.
+    """
+    def order_moves(self, depth, tt_move):
+        return sorted(
+            self.possible_moves, key=lambda m: (-self.num_neighbors(m), m)
+        )
+
+
+class NeighbourOrderPlayer(Player):
+    tracker_class = NeighbourOrderTracker
+
+
+def opening(n, rng, turns=None):
+    """
+    A random (capture free) opening of the given number of turns (default
+    n) on an n board, as actions.
+    """
+    while True:
+        game = random_game(n, rng, max_turns=turns or n)
+        if all(coord is not None for _, coord in game):
+            return [(token, move_to_action(r * n + q, n))
+                for token, (r, q) in game]
+
+
+def search_nodes(player_class, n, actions, depth):
+    """
+    Nodes searched and time taken to search the position after actions.
+    """
+    player = player_class("red", n)
+    for token, action in actions:
+        player.turn(token, action)
+    board = player.tracking_board
+    start = timer()
+    board.new_search()
+    board.search_root(depth)
+    return board.nodes, timer() - start
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = random.Random(0)
+    print(f"{'n':>3} {'depth':>5} {'nodes (old)':>12} {'nodes (new)':>12} "
+        f"{'ratio':>6} {'time (old)':>11} {'time (new)':>11} "
+        f"{'nodes (pvs)':>12} {'time (pvs)':>11}")
+    for n in _SIZES:
+        depth = _DEPTHS.get(n, 3)
+        totals = [0] * 6
+        for _ in range(num_positions):
+            actions = opening(n, rng)
+            old = search_nodes(NeighbourOrderPlayer, n, actions, depth)
+            new = search_nodes(Player, n, actions, depth)
+            pvs = search_nodes(PVSPlayer, n, actions, depth)
+            for i, value in enumerate(old + new + pvs):
+                totals[i] += value
+        old_nodes, old_time, new_nodes, new_time, pvs_nodes, pvs_time = totals
+        print(f"{n:>3} {depth:>5} {old_nodes:>12} {new_nodes:>12} "
+            f"{new_nodes / old_nodes:>6.2f} {old_time:>10.2f}s "
+            f"{new_time:>10.2f}s {pvs_nodes:>12} {pvs_time:>10.2f}s")
+
+
+if __name__ == "__main__":
+    main()
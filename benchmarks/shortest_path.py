@@ -0,0 +1,94 @@
+"""
+Check connection_distance (slips_and_falls.utils.heuristics) against a
+reference 0-1 breadth-first search with a deque over each cell's neighbours,
+over random positions. Then measure evaluations per second of
+shortest_path_eval, the reference, and edge_branch_eval for comparison, on
+each board size.
+
+Usage: python -m benchmarks.shortest_path [positions per size]
+"""
+
+import sys
+import random
+from collections import deque
+
+from slips_and_falls.utils import heuristics
+from referee.topology import topology
+from benchmarks.evaluation import positions, evals_per_second
+
+_SIZES = range(5, 16, 2)
+
+
+def reference_distance(tracking_board, player):
+    """
+    connection_distance, found cell by cell: a 0-1 breadth-first search
+    from every start edge cell, where entering player's tiles costs 0 and
+    entering empty cells 1.
+    """
+    topo = topology(tracking_board.n)
+    own = tracking_board._masks[player]
+    blocked = tracking_board._masks[heuristics._OPPONENT[player]]
+    start, end = topo.start_masks[player], topo.end_masks[player]
+    cost = lambda i: 0 if own >> i & 1 else 1
+    distances = [None] * topo.size
+    queue = deque()
+    for i in range(topo.size):
+        if start >> i & 1 and not blocked >> i & 1:
+            distances[i] = cost(i)
+            queue.appendleft(i) if cost(i) == 0 else queue.append(i)
+    while queue:
+        i = queue.popleft()
+        if end >> i & 1:
+            return distances[i]
+        for j in topo.neighbours[i]:
+            if blocked >> j & 1:
+                continue
+            distance = distances[i] + cost(j)
+            if distances[j] is None or distance < distances[j]:
+                distances[j] = distance
+                queue.appendleft(j) if cost(j) == 0 else queue.append(j)
+    return None
+
+
+def reference_eval(tracking_board, player):
+    us = reference_distance(tracking_board, player)
+    them = reference_distance(tracking_board, heuristics._OPPONENT[player])
+    if us == 0:
+        return heuristics._WIN_VALUE
+    if them == 0:
+        return -heuristics._WIN_VALUE
+    worst = tracking_board.n ** 2
+    return (worst if them is None else them) - (worst if us is None else us)
+
+
+def check_distances(boards):
+    for board, _ in boards:
+        for token in ("red", "blue"):
+            expected = reference_distance(board, token)
+            actual = heuristics.connection_distance(board, token)
+            assert actual == expected, (board.n, token, actual, expected)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    rng = random.Random(0)
+    rows = [
+        ("shortest_path_eval", heuristics.shortest_path_eval),
+        ("reference (deque)", reference_eval),
+        ("edge_branch_eval", heuristics.edge_branch_eval),
+    ]
+    title = "evaluations per second"
+    width = max(len(title), *(len(name) for name, _ in rows))
+    print(f"{title:<{width}} " +
+        " ".join(f"{f'n={n}':>8}" for n in _SIZES))
+    boards = {n: positions(n, rng, count) for n in _SIZES}
+    for n in _SIZES:
+        check_distances(boards[n])
+    for name, evaluate in rows:
+        rates = [evals_per_second(evaluate, boards[n], 10) for n in _SIZES]
+        print(f"{name:<{width}} " +
+            " ".join(f"{rate:>8.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
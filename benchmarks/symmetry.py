@@ -0,0 +1,49 @@
+"""
+Compare search node counts on small boards with transposition table entries
+shared between symmetric positions (180 degree rotation and swap) against
+keying each position separately, over random opening positions.
+
+Usage: python -m benchmarks.symmetry [positions per size]
+"""
+
+import sys
+import random
+
+from slips_and_falls.player import Player
+from slips_and_falls.final_tracker import FinalTracker
+from benchmarks.search import opening, search_nodes
+
+# Board sizes and (fixed) search depths to compare
+_DEPTHS = {3: 8, 4: 5, 5: 4}
+
+
+class UnsharedTracker(FinalTracker):
+    """
+    Tracker whose transposition table keys each position separately.
+    """
+    def tt_key(self):
+        return self.zobrist, 0
+
+
+class UnsharedPlayer(Player):
+    tracker_class = UnsharedTracker
+
+
+def main():
+    num_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = random.Random(0)
+    print(f"{'n':>3} {'depth':>5} {'turns':>5} {'nodes (unshared)':>17} "
+        f"{'nodes (shared)':>15} {'ratio':>6}")
+    for n, depth in _DEPTHS.items():
+        for turns in (1, 2):
+            unshared = shared = 0
+            for _ in range(num_positions):
+                actions = opening(n, rng, turns=turns)
+                unshared += search_nodes(UnsharedPlayer, n, actions, depth)[0]
+                shared += search_nodes(Player, n, actions, depth)[0]
+            print(f"{n:>3} {depth:>5} {turns:>5} {unshared:>17} {shared:>15} "
+                f"{shared / unshared:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare traversals per second on full (randomly coloured) n = 15 boards:
+finding the connected group of every cell with the referee's previous
+queue.Queue search, with Board.connected_coords (now a deque search over
+precomputed adjacency lists, from referee.traversal), with
+referee.traversal.reachable alone, and with BitBoard's flood fill. All four
+are checked to agree first.
+
+Usage: python -m benchmarks.traversal [boards]
+"""
+
+import sys
+import random
+from queue import Queue
+from time import perf_counter as timer
+
+from referee.board import Board
+from referee.bitboard import BitBoard
+from referee.traversal import reachable
+
+_N = 15
+
+
+def queue_connected_coords(board, start_coord):
+    """
+    Board.connected_coords as it was, searching with a queue.Queue.
+    """
+    token_type = board._data[start_coord]
+    found = set()
+    queue = Queue(0)
+    queue.put(start_coord)
+    while not queue.empty():
+        curr_coord = queue.get()
+        found.add(curr_coord)
+        for coord in board._coord_neighbours(curr_coord):
+            if coord not in found and board._data[coord] == token_type:
+                queue.put(coord)
+    return list(found)
+
+
+def full_board(n, rng):
+    """
+    A Board and BitBoard with every cell randomly red or blue, and the
+    index sets of each colour's cells.
+    """
+    board, bitboard = Board(n), BitBoard(n)
+    cells = {"red": set(), "blue": set()}
+    for r in range(n):
+        for q in range(n):
+            token = rng.choice(("red", "blue"))
+            board[(r, q)] = bitboard[(r, q)] = token
+            cells[token].add(r * n + q)
+    return board, bitboard, cells
+
+
+def per_second(traverse, coords, repeats):
+    """
+    Traversals per second, running traverse on each coord repeats times.
+    """
+    start = timer()
+    for _ in range(repeats):
+        for coord in coords:
+            traverse(coord)
+    return repeats * len(coords) / (timer() - start)
+
+
+def main():
+    boards = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rng = random.Random(0)
+    n = _N
+    coords = [(r, q) for r in range(n) for q in range(n)]
+    totals = [0, 0, 0, 0]
+    for _ in range(boards):
+        board, bitboard, cells = full_board(n, rng)
+        index_search = lambda coord: reachable(
+            n, [coord[0] * n + coord[1]], cells[bitboard[coord]]
+        )
+        for coord in coords:
+            expected = sorted(queue_connected_coords(board, coord))
+            assert sorted(board.connected_coords(coord)) == expected
+            assert sorted(bitboard.connected_coords(coord)) == expected
+            assert sorted(index_search(coord)) == sorted(
+                r * n + q for r, q in expected)
+        rates = [
+            per_second(lambda c: queue_connected_coords(board, c), coords, 1),
+            per_second(board.connected_coords, coords, 5),
+            per_second(index_search, coords, 20),
+            per_second(bitboard.connected_coords, coords, 20),
+        ]
+        for i, rate in enumerate(rates):
+            totals[i] += rate / boards
+    names = ["queue.Queue (old)", "Board (deque)", "traversal.reachable",
+        "BitBoard flood fill"]
+    print(f"traversals per second on full n={n} boards:")
+    for name, rate in zip(names, totals):
+        print(f"{name:>20} {rate:>10.0f} {rate / totals[0]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Provide a bitboard implementation of the Cachex board. It exposes the same
+public API as referee.board.Board, but stores one Python int bitmask per
+colour (bit r * n + q is set iff that colour occupies cell (r, q)).
+
+Neighbour masks are taken from the board's topology (see referee.topology),
+and diamond capture masks are pre-computed once per board size. Both are
+shared between all boards of that size, so placing a token, applying
+captures, swapping and finding connected groups reduce to a handful of
+integer operations rather than repeated NumPy scalar indexing.
+"""
+
+from referee.board import _ADD, _CAPTURE_PATTERNS
+from referee.topology import topology
+
+# Map between player token types
+_OPPONENT = {"red": "blue", "blue": "red"}
+
+# Pre-computed tables, keyed by board size n
+_TABLES = {}
+
+
+class _BoardTables:
+    """
+    Lookup tables for a board of size n. Cells are indexed r * n + q.
+    """
+    def __init__(self, n):
+        self.n = n
+        topo = topology(n)
+        self.coords = topo.coords
+        self.index = topo.index
+        self.bits = {coord: 1 << i for i, coord in enumerate(self.coords)}
+        self.full = topo.full
+
+        inside = lambda c: 0 <= c[0] < n and 0 <= c[1] < n
+
+        # (Within-bounds) neighbours of each cell, as a bitmask and as a
+        # tuple of coordinates
+        self.neighbours = topo.neighbour_masks
+        self.neighbour_coords = topo.neighbour_coords
+
+        # Diamond capture patterns for each cell, stored as
+        # (opposite cell bit, both neighbour bits). Patterns which fall
+        # (partially) outside the board are dropped here, once.
+        self.captures = []
+        for coord in self.coords:
+            patterns = []
+            for pattern in _CAPTURE_PATTERNS:
+                opp, mid1, mid2 = [_ADD(coord, step) for step in pattern]
+                if inside(opp) and inside(mid1) and inside(mid2):
+                    patterns.append(
+                        (self.bits[opp], self.bits[mid1] | self.bits[mid2])
+                    )
+            self.captures.append(tuple(patterns))
+
+        # Bit of the mirrored cell (q, r) for each cell (r, q)
+        self.transpose = [1 << (q * n + r) for r, q in self.coords]
+
+        # Cell index maps for the board's symmetries: identity, mirror along
+        # the major axis (as in swap), 180 degree rotation, and both
+        self.symmetries = [
+            [r * n + q for r, q in self.coords],
+            [q * n + r for r, q in self.coords],
+            [(n - 1 - r) * n + (n - 1 - q) for r, q in self.coords],
+            [(n - 1 - q) * n + (n - 1 - r) for r, q in self.coords],
+        ]
+
+
+def board_tables(n):
+    """
+    Get (building if necessary) the lookup tables for board size n.
+    """
+    tables = _TABLES.get(n)
+    if tables is None:
+        tables = _TABLES[n] = _BoardTables(n)
+    return tables
+
+
+def bit_indices(mask):
+    """
+    Yield the index of each set bit in mask, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitBoard:
+    __slots__ = ("n", "_tables", "_masks")
+
+    def __init__(self, n):
+        """
+        Initialise board of given size n.
+        """
+        self.n = n
+        self._tables = board_tables(n)
+        self._masks = {"red": 0, "blue": 0}
+
+    def __getitem__(self, coord):
+        """
+        Get the token at given board coord (r, q).
+        """
+        bit = self._tables.bits[coord]
+        if self._masks["red"] & bit:
+            return "red"
+        if self._masks["blue"] & bit:
+            return "blue"
+        return None
+
+    def __setitem__(self, coord, token):
+        """
+        Set the token at given board coord (r, q).
+        """
+        bit = self._tables.bits[coord]
+        self._masks["red"] &= ~bit
+        self._masks["blue"] &= ~bit
+        if token is not None:
+            self._masks[token] |= bit
+
+    def digest(self):
+        """
+        Digest of the board state (to help with counting repeated states).
+        """
+        return self._masks["red"], self._masks["blue"]
+
+    def swap(self):
+        """
+        Swap player positions by mirroring the state along the major
+        board axis, combined with a swap between player token types.
+        """
+        transpose = self._tables.transpose
+        red = blue = 0
+        for i in bit_indices(self._masks["blue"]):
+            red |= transpose[i]
+        for i in bit_indices(self._masks["red"]):
+            blue |= transpose[i]
+        self._masks["red"] = red
+        self._masks["blue"] = blue
+
+    def place(self, token, coord):
+        """
+        Place a token on the board and apply captures if they exist.
+        Return coordinates of captured tokens.
+        """
+        coords = self._tables.coords
+        captured = self.place_at(token, self._tables.index[coord])
+        return [coords[i] for i in bit_indices(captured)]
+
+    def place_at(self, token, i):
+        """
+        As place, but taking the cell as an index (r * n + q) and returning
+        a mask of the captured tokens (0 if there were none).
+        """
+        opp_token = _OPPONENT[token]
+        bit = 1 << i
+        own = self._masks[token] | bit
+        opp = self._masks[opp_token] & ~bit
+        self._masks[token] = own
+
+        # Capturing is deferred (accumulated in a mask) in case of overlaps
+        captured = 0
+        for opp_bit, mid_bits in self._tables.captures[i]:
+            if own & opp_bit and opp & mid_bits == mid_bits:
+                captured |= mid_bits
+        self._masks[opp_token] = opp & ~captured if captured else opp
+        return captured
+
+    def set_at(self, i, token):
+        """
+        Set the token at the cell with the given index (r * n + q).
+        """
+        bit = 1 << i
+        self._masks["red"] &= ~bit
+        self._masks["blue"] &= ~bit
+        if token is not None:
+            self._masks[token] |= bit
+
+    def connected_coords(self, start_coord):
+        """
+        Find connected coordinates from start_coord. This uses the token
+        value of the start_coord cell to determine which other cells are
+        connected (e.g., all will be the same value).
+        """
+        token = self[start_coord]
+        if token is None:
+            allowed = self._tables.full & ~(
+                self._masks["red"] | self._masks["blue"])
+        else:
+            allowed = self._masks[token]
+
+        # Flood fill outwards from the start cell one layer at a time
+        neighbours = self._tables.neighbours
+        reachable = frontier = self._tables.bits[start_coord]
+        while frontier:
+            grown = 0
+            for i in bit_indices(frontier):
+                grown |= neighbours[i]
+            frontier = grown & allowed & ~reachable
+            reachable |= frontier
+
+        coords = self._tables.coords
+        return [coords[i] for i in bit_indices(reachable)]
+
+    def inside_bounds(self, coord):
+        """
+        True iff coord inside board bounds.
+        """
+        r, q = coord
+        return r >= 0 and r < self.n and q >= 0 and q < self.n
+
+    def is_occupied(self, coord):
+        """
+        True iff coord is occupied by a token (e.g., not None).
+        """
+        bit = self._tables.bits[coord]
+        return bool((self._masks["red"] | self._masks["blue"]) & bit)
+
+    def _coord_neighbours(self, coord):
+        """
+        Returns (within-bounds) neighbouring coordinates for given coord.
+        """
+        return list(
+            self._tables.neighbour_coords[self._tables.index[coord]])
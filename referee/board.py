@@ -12,8 +12,10 @@ you should think carefully about how to design your own data structures for
 representing the state of a game, with respect to your chosen strategy. 
 """
 
-from queue import Queue
-from numpy import zeros, array, roll, vectorize
+from numpy import zeros, array, roll, flatnonzero
+
+from referee.topology import topology
+from referee.traversal import reachable
 
 # Utility function to add two coord tuples
 _ADD = lambda a, b: (a[0] + b[0], a[1] + b[1])
@@ -38,6 +40,11 @@ _CAPTURE_PATTERNS = [[_ADD(n1, n2), n1, n2]
         list(zip(_HEX_STEPS, roll(_HEX_STEPS, 1))) + 
         list(zip(_HEX_STEPS, roll(_HEX_STEPS, 2)))]
 
+# In-bounds capture patterns for each cell, keyed by board size n (see
+# _capture_table). Each pattern is an (opposite, neighbour 1, neighbour 2)
+# coordinate triple.
+_CAPTURE_TABLES = {}
+
 # Maps between player string and internal token type
 _TOKEN_MAP_OUT = { 0: None, 1: "red", 2: "blue" }
 _TOKEN_MAP_IN = {v: k for k, v in _TOKEN_MAP_OUT.items()}
@@ -45,6 +52,27 @@ _TOKEN_MAP_IN = {v: k for k, v in _TOKEN_MAP_OUT.items()}
 # Map between player token types
 _SWAP_PLAYER = { 0: 0, 1: 2, 2: 1 }
 
+# Same map as a lookup array (indexed by token type) for whole-board swaps
+_SWAP_LOOKUP = array([_SWAP_PLAYER[t] for t in range(3)])
+
+def _capture_table(n):
+    """
+    Get (building on first use) the capture patterns for each cell of an
+    n x n board, with patterns falling outside the board already removed.
+    """
+    table = _CAPTURE_TABLES.get(n)
+    if table is None:
+        inside = lambda c: 0 <= c[0] < n and 0 <= c[1] < n
+        table = {}
+        for r in range(n):
+            for q in range(n):
+                coords = [[(r + int(s[0]), q + int(s[1])) for s in pattern]
+                    for pattern in _CAPTURE_PATTERNS]
+                table[(r, q)] = tuple(tuple(c) for c in coords
+                    if all(map(inside, c)))
+        _CAPTURE_TABLES[n] = table
+    return table
+
 class Board:
     def __init__(self, n):
         """
@@ -52,6 +80,9 @@ class Board:
         """
         self.n = n
         self._data = zeros((n, n), dtype=int)
+        self._swap_buffer = zeros((n, n), dtype=int)
+        self._captures = _capture_table(n)
+        self._topology = topology(n)
 
     def __getitem__(self, coord):
         """
@@ -76,10 +107,12 @@ class Board:
         """
         Swap player positions by mirroring the state along the major 
         board axis. This is really just a "matrix transpose" op combined
-        with a swap between player token types.
+        with a swap between player token types. The result is written into
+        a spare buffer (which then becomes the board), so no arrays are
+        allocated.
         """
-        swap_player_tokens = vectorize(lambda t: _SWAP_PLAYER[t])
-        self._data = swap_player_tokens(self._data.transpose())
+        _SWAP_LOOKUP.take(self._data.transpose(), out=self._swap_buffer)
+        self._data, self._swap_buffer = self._swap_buffer, self._data
 
     def place(self, token, coord):
         """
@@ -98,19 +131,12 @@ class Board:
         # Get search token type
         token_type = self._data[start_coord]
 
-        # Use bfs from start coordinate
-        reachable = set()
-        queue = Queue(0)
-        queue.put(start_coord)
-
-        while not queue.empty():
-            curr_coord = queue.get()
-            reachable.add(curr_coord)
-            for coord in self._coord_neighbours(curr_coord):
-                if coord not in reachable and self._data[coord] == token_type:
-                    queue.put(coord)
-
-        return list(reachable)
+        # Use bfs from start coordinate, over the (flattened) cells with
+        # the same token
+        n = self.n
+        cells = set(flatnonzero(self._data == token_type).tolist())
+        r, q = start_coord
+        return [divmod(i, n) for i in reachable(n, [r * n + q], cells)]
 
     def inside_bounds(self, coord):
         """
@@ -130,20 +156,19 @@ class Board:
         Check coord for diamond captures, and apply these to the board
         if they exist. Returns a list of captured token coordinates.
         """
-        opp_type = self._data[coord]
+        data = self._data
+        opp_type = data[coord]
         mid_type = _SWAP_PLAYER[opp_type]
         captured = set()
 
-        # Check each capture pattern intersecting with coord
-        for pattern in _CAPTURE_PATTERNS:
-            coords = [_ADD(coord, s) for s in pattern]
-            # No point checking if any coord is outside the board!
-            if all(map(self.inside_bounds, coords)):
-                tokens = [self._data[coord] for coord in coords]
-                if tokens == [opp_type, mid_type, mid_type]:
-                    # Capturing has to be deferred in case of overlaps
-                    # Both mid cell tokens should be captured
-                    captured.update(coords[1:])
+        # Check each (in-bounds) capture pattern intersecting with coord
+        for opp, mid1, mid2 in self._captures[coord]:
+            if (data[opp] == opp_type and data[mid1] == mid_type and
+                    data[mid2] == mid_type):
+                # Capturing has to be deferred in case of overlaps
+                # Both mid cell tokens should be captured
+                captured.add(mid1)
+                captured.add(mid2)
 
         # Remove any captured tokens
         for coord in captured:
@@ -155,5 +180,5 @@ class Board:
         """
         Returns (within-bounds) neighbouring coordinates for given coord.
         """
-        return [_ADD(coord, step) for step in _HEX_STEPS \
-            if self.inside_bounds(_ADD(coord, step))]
+        topo = self._topology
+        return list(topo.neighbour_coords[topo.index[coord]])
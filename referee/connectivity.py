@@ -0,0 +1,238 @@
+"""
+Provide a class to incrementally track whether either player has connected
+their two board edges, without searching the board after every turn.
+
+Each colour has a union-find forest over the n * n cells plus two virtual
+nodes for its start and end edges, so "has red/blue connected its edges" is
+a pair of find() calls. Every change is written to an undo log, and moves
+can be rolled back one at a time (to support make/unmake in search). The
+log is one flat list, with each entry's fields followed by its tag (and
+each move preceded by a mark), so entries aren't kept as tuples. Path
+compression is not used since it cannot be cheaply undone, so union by rank
+keeps each find() to O(log n) steps.
+
+Each root also records the lowest and highest row (along the colour's axis)
+covered by its group, so how far a colour's stones reach in from either
+edge can be read off the virtual edge nodes' groups.
+
+Captures remove stones (possibly splitting groups), which a union-find
+cannot do directly. As captures are rare, the captured colour's forest is
+instead snapshotted to the undo log and rebuilt from its remaining stones.
+"""
+
+from referee.bitboard import board_tables, bit_indices
+
+# Undo log entry tags, and the mark pushed at the start of each move
+_UNION = 0
+_MASK = 1
+_SNAPSHOT = 2
+_MARK = 3
+
+
+class _Forest:
+    """
+    Union-find forest for one colour. Cell i is node i, and the virtual
+    start/end edge nodes are n * n and n * n + 1.
+    """
+    def __init__(self, n, axis):
+        self.n = n
+        self.start = n * n
+        self.end = n * n + 1
+        self.parent = list(range(n * n + 2))
+        self.rank = [0] * (n * n + 2)
+        self.mask = 0
+
+        # Virtual edge nodes each cell should be joined to when occupied
+        self.edges = []
+        heights = []
+        for r in range(n):
+            for q in range(n):
+                height = (r, q)[axis]
+                heights.append(height)
+                self.edges.append(
+                    ((self.start,) if height == 0 else ()) +
+                    ((self.end,) if height == n - 1 else ())
+                )
+
+        # Lowest/highest row covered by each group (only valid for roots).
+        # The virtual nodes cover no rows until joined to a stone
+        self.initial_low = heights + [n, n]
+        self.initial_high = heights + [-1, -1]
+        self.low = self.initial_low[:]
+        self.high = self.initial_high[:]
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    def union(self, a, b, log):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        rank = self.rank
+        if rank[a] < rank[b]:
+            a, b = b, a
+        self.parent[b] = a
+        bumped = rank[a] == rank[b]
+        if bumped:
+            rank[a] += 1
+        low, high = self.low, self.high
+        if log is not None:
+            log += self, b, a, bumped, low[a], high[a], _UNION
+        if low[b] < low[a]:
+            low[a] = low[b]
+        if high[b] > high[a]:
+            high[a] = high[b]
+
+    def add(self, i, neighbours, log):
+        """
+        Add a stone at cell i, joining it to any occupied neighbours and
+        to the virtual edge nodes.
+        """
+        bit = 1 << i
+        if log is not None:
+            log += self, self.mask, _MASK
+        self.mask |= bit
+        for j in bit_indices(neighbours[i] & self.mask):
+            self.union(i, j, log)
+        for edge in self.edges[i]:
+            self.union(i, edge, log)
+
+    def rebuild(self, mask, neighbours, log):
+        """
+        Reset the forest to contain exactly the stones in mask, saving a
+        snapshot of the current forest to the log.
+        """
+        log += (self, self.parent, self.rank, self.mask, self.low, self.high,
+            _SNAPSHOT)
+        self.parent = list(range(len(self.parent)))
+        self.rank = [0] * len(self.rank)
+        self.mask = 0
+        self.low = self.initial_low[:]
+        self.high = self.initial_high[:]
+        # Changes are covered by the snapshot, so don't log them
+        for i in bit_indices(mask):
+            self.add(i, neighbours, None)
+
+    def connected(self):
+        return self.find(self.start) == self.find(self.end)
+
+    def reach(self, from_start):
+        if from_start:
+            return self.high[self.find(self.start)] + 1
+        return self.n - self.low[self.find(self.end)]
+
+
+class Connectivity:
+    def __init__(self, n):
+        """
+        Initialise (empty) connectivity tracking for a board of size n.
+        """
+        self.n = n
+        self._tables = board_tables(n)
+        self._forests = {"red": _Forest(n, 0), "blue": _Forest(n, 1)}
+        self._log = []
+
+    def place(self, token, coord, captured=()):
+        """
+        Register a token placed at coord, along with the coordinates of any
+        (opponent) tokens it captured. This can be undone with undo().
+        """
+        index = self._tables.index
+        self.place_at(
+            token, index[coord], sum(1 << index[c] for c in captured)
+        )
+
+    def place_at(self, token, i, captured=0):
+        """
+        As place, but taking the cell as an index (r * n + q) and the
+        captured tokens as a mask.
+        """
+        log = self._log
+        log.append(_MARK)
+        neighbours = self._tables.neighbours
+        forest = self._forests[token]
+        forest.add(i, neighbours, log)
+        if captured:
+            opp_forest = self._forests["blue" if token == "red" else "red"]
+            opp_forest.rebuild(opp_forest.mask & ~captured, neighbours, log)
+
+    def swap(self):
+        """
+        Register a swap (see Board.swap): both colours' stones are mirrored
+        along the major axis and exchanged. This can be undone with undo().
+        """
+        log = self._log
+        log.append(_MARK)
+        transpose = self._tables.transpose
+        red = self._forests["red"]
+        blue = self._forests["blue"]
+        new_red = new_blue = 0
+        for i in bit_indices(blue.mask):
+            new_red |= transpose[i]
+        for i in bit_indices(red.mask):
+            new_blue |= transpose[i]
+        red.rebuild(new_red, self._tables.neighbours, log)
+        blue.rebuild(new_blue, self._tables.neighbours, log)
+
+    def undo(self):
+        """
+        Roll back the most recent place() or swap().
+        """
+        pop = self._log.pop
+        while True:
+            tag = pop()
+            if tag == _UNION:
+                high = pop()
+                low = pop()
+                bumped = pop()
+                root = pop()
+                child = pop()
+                forest = pop()
+                forest.parent[child] = child
+                if bumped:
+                    forest.rank[root] -= 1
+                forest.low[root] = low
+                forest.high[root] = high
+            elif tag == _MASK:
+                mask = pop()
+                pop().mask = mask
+            elif tag == _SNAPSHOT:
+                high = pop()
+                low = pop()
+                mask = pop()
+                rank = pop()
+                parent = pop()
+                forest = pop()
+                (forest.parent, forest.rank, forest.mask, forest.low,
+                    forest.high) = parent, rank, mask, low, high
+            else:
+                return
+
+    def connected(self, token):
+        """
+        True iff token's stones form a path between its two board edges.
+        """
+        return self._forests[token].connected()
+
+    def reach(self, token, from_start=True):
+        """
+        Number of rows (along token's axis) spanned by token's stones that
+        are connected to its start (or end) edge, counted from that edge.
+        This is 0 if none of token's stones touch that edge, and n iff
+        token has connected its edges.
+        """
+        return self._forests[token].reach(from_start)
+
+    def forest(self, token):
+        """
+        Token's stones (as a bitmask) and union-find forest, as lists of
+        each node's parent and (for roots) lowest and highest row covered.
+        Cells are nodes 0 to n * n - 1, and n * n and n * n + 1 are the
+        virtual start and end edge nodes. For reading groups off in bulk;
+        don't modify them.
+        """
+        forest = self._forests[token]
+        return forest.mask, forest.parent, forest.low, forest.high
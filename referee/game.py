@@ -12,6 +12,7 @@ import collections
 from itertools import islice
 
 from referee.board import Board
+from referee.connectivity import Connectivity
 from referee.log import comment
 
 # Game-specific constants for use in other modules:
@@ -173,6 +174,7 @@ class Game:
     def __init__(self, n, log_filename=None, log_file=None):
         # Initialise game board
         self.board = Board(n)
+        self.connectivity = Connectivity(n)
 
         # Also keep track of some other state variables for win/draw
         # detection (number of turns, state history)
@@ -228,6 +230,7 @@ class Game:
 
             # Apply STEAL action
             self.board.swap()
+            self.connectivity.swap()
             self.last_coord = (-1, -1)
 
         elif atype == _ACTION_PLACE:
@@ -236,6 +239,7 @@ class Game:
             # Apply PLACE action
             coord = tuple(aargs)
             self.last_captures = self.board.place(player, coord)
+            self.connectivity.place(player, coord, self.last_captures)
             self.last_coord = coord
         else:
             # This should never happen, but good to be defensive
@@ -319,15 +323,14 @@ class Game:
         # Game end conditions
 
         # Condition 1: player forms a continuous path spanning board (win).
-        # check reachable coords from just-placed token to detect winning path
+        # connectivity tracks whether the player's edges are joined, so the
+        # board only needs searching (to find the winning path) once won
         # NOTE: No point checking this while total turns is less than 2n - 1
         if self.nturns >= (self.board.n * 2) - 1:
-            _, r, q = action
-            reachable = self.board.connected_coords((r, q))
-            axis_vals = [coord[_PLAYER_AXIS[player]] for coord in reachable]
-            if min(axis_vals) == 0 and max(axis_vals) == self.board.n - 1:
+            if self.connectivity.connected(player):
+                _, r, q = action
                 self.result = "winner: " + player
-                self.result_cluster = set(reachable)
+                self.result_cluster = set(self.board.connected_coords((r, q)))
                 return
 
         # Condition 2: the same state has occurred too many times (draw)
@@ -0,0 +1,74 @@
+"""
+Provide the topology of a board of each size n, built once and shared by
+the referee's boards and traversals and by agents, so that neighbours are
+looked up rather than found by stepping and bounds checking each time.
+
+Cells are indexed r * n + q. For each cell, the topology holds the indices
+and coordinates of its neighbours (in clockwise hex step order, as in
+referee.board) and the same neighbours as a bitmask, along with bitmasks of
+the cells on each colour's start and end edges. A whole set of cells (as a
+bitmask) can also be grown by a step in every direction at once with
+shifts (see Topology.grow).
+"""
+
+# Neighbour hex steps, in clockwise order
+HEX_STEPS = ((1, -1), (1, 0), (0, 1), (-1, 1), (-1, 0), (0, -1))
+
+# Built topologies, keyed by board size n
+_TOPOLOGIES = {}
+
+
+class Topology:
+    def __init__(self, n):
+        self.n = n
+        self.size = n * n
+        self.full = (1 << self.size) - 1
+        self.coords = tuple((i // n, i % n) for i in range(self.size))
+        self.index = {coord: i for i, coord in enumerate(self.coords)}
+
+        neighbours = []
+        for r, q in self.coords:
+            cells = [(r + dr, q + dq) for dr, dq in HEX_STEPS]
+            neighbours.append(tuple(nr * n + nq for nr, nq in cells
+                if 0 <= nr < n and 0 <= nq < n))
+        self.neighbours = tuple(neighbours)
+        self.neighbour_coords = tuple(
+            tuple(self.coords[j] for j in nbrs) for nbrs in self.neighbours
+        )
+        self.neighbour_masks = tuple(
+            sum(1 << j for j in nbrs) for nbrs in self.neighbours
+        )
+
+        # red joins the first and last rows, blue the first and last columns
+        row = lambda r: sum(1 << (r * n + q) for q in range(n))
+        column = lambda q: sum(1 << (r * n + q) for r in range(n))
+        self.start_masks = {"red": row(0), "blue": column(0)}
+        self.end_masks = {"red": row(n - 1), "blue": column(n - 1)}
+
+        # cells with a neighbour at q - 1 (not in the first column), and at
+        # q + 1 (not in the last)
+        self.has_left = self.full & ~column(0)
+        self.has_right = self.full & ~column(n - 1)
+
+    def grow(self, mask):
+        """
+        The cells in mask, along with all of their neighbours. The hex steps
+        are shifts of the cell index by -1, +1, -n, +n, n - 1 and -(n - 1).
+        """
+        n = self.n
+        left = mask & self.has_left
+        right = mask & self.has_right
+        return (
+            mask | mask << n | mask >> n | left >> 1 | right << 1 |
+            left << (n - 1) | right >> (n - 1)
+        ) & self.full
+
+
+def topology(n):
+    """
+    Get (building if necessary) the topology of an n board.
+    """
+    topo = _TOPOLOGIES.get(n)
+    if topo is None:
+        topo = _TOPOLOGIES[n] = Topology(n)
+    return topo
@@ -0,0 +1,75 @@
+"""
+Provide graph traversals over the cells of a board, shared by the referee's
+boards and by agents. Cells are indexed r * n + q, and neighbours are read
+from each board size's precomputed topology (see referee.topology).
+
+Searches keep their frontier in a collections.deque. queue.Queue takes a
+lock on every put and get to be safe between threads, which these
+single-threaded searches don't need.
+"""
+
+from collections import deque
+
+from referee.topology import topology
+
+
+def reachable(n, starts, allowed):
+    """
+    Breadth-first search on an n board from the cells (indices) in starts,
+    only entering cells in allowed (a collection of indices, e.g. a set).
+    Returns the indices reached, in order, starting with starts.
+    """
+    nbrs = topology(n).neighbours
+    order = list(dict.fromkeys(starts))
+    seen = set(order)
+    queue = deque(order)
+    while queue:
+        for j in nbrs[queue.popleft()]:
+            if j not in seen and j in allowed:
+                seen.add(j)
+                order.append(j)
+                queue.append(j)
+    return order
+
+
+def distances(n, starts, allowed, max_depth=None):
+    """
+    As reachable, but returning the number of steps to each cell reached
+    (as a dict), stopping at max_depth steps if given.
+    """
+    nbrs = topology(n).neighbours
+    depth = dict.fromkeys(starts, 0)
+    queue = deque(depth)
+    while queue:
+        i = queue.popleft()
+        if depth[i] == max_depth:
+            continue
+        for j in nbrs[i]:
+            if j not in depth and j in allowed:
+                depth[j] = depth[i] + 1
+                queue.append(j)
+    return depth
+
+
+def components(n, cells):
+    """
+    Split cells (a collection of indices) into connected groups, each a list
+    of indices, found by depth-first search.
+    """
+    nbrs = topology(n).neighbours
+    seen = set()
+    groups = []
+    for start in cells:
+        if start in seen:
+            continue
+        seen.add(start)
+        group = [start]
+        stack = [start]
+        while stack:
+            for j in nbrs[stack.pop()]:
+                if j not in seen and j in cells:
+                    seen.add(j)
+                    group.append(j)
+                    stack.append(j)
+        groups.append(group)
+    return groups
@@ -1 +1,4 @@
-from slips_and_falls.player import Player
+from slips_and_falls.player import (
+    Player, PVSPlayer, ParallelPlayer, PrunedPlayer, WeightedPlayer,
+    ShortestPathPlayer
+)
@@ -1,150 +1,318 @@
 import random
+import multiprocessing
 import numpy as np
 from math import inf
 
-from referee.board import Board
-from slips_and_falls.utils.helper_functions import action_to_move, move_to_action
-from slips_and_falls.utils.heuristics import longest_edge_branch
+from referee.bitboard import BitBoard, bit_indices
+from referee.topology import topology
+from referee.connectivity import Connectivity
+from referee.traversal import distances
+from slips_and_falls.utils.helper_functions import action_to_move
+from slips_and_falls.utils.bridges import bridge_table
+from slips_and_falls.utils.transposition import (
+    TranspositionTable, EXACT, LOWER, UPPER
+)
+from slips_and_falls.utils.opening_book import load_book, STEAL_INDEX
+from slips_and_falls.utils.tablebase import load_tablebase
 from time import perf_counter as timer
-import heapq
-from queue import Queue
 from collections import defaultdict as dd
 
-_NEIGHBOUR_OFFSETS = (
-    (0, 1),
-    (0, -1),
-    (1, 0),
-    (-1, 0),
-    (1, -1),
-    (-1, 1)
-)
 _ACTION_STEAL = "STEAL"
 _OPPONENT = {"red": "blue", "blue": "red", None: None}
 _WIN_VALUE = 1e7
 
-depth_dict = {
-    3 : 10,
-    4 : 5,
-    5 : 4,
-    6 : 4
-}
-
-
-class FinalTracker(Board):
-    def __init__(self, player, evaluate, n):
+# Zobrist tables are drawn from a fixed seed (offset by board size), so keys
+# are the same from game to game and can index the opening book
+ZOBRIST_SEED = 20220503
+
+# Depth live search typically reaches in the opening (by iterative deepening
+# to the soft deadline, at ply 2). A book move is only played if it was
+# searched deeper than this, as otherwise searching is at least as good
+_LIVE_DEPTH = lambda n: 8 if n <= 4 else 7 if n <= 9 else 6
+
+# Time management: total budget (seconds) of n^2, of which a fraction is
+# held back. Each move gets a share of what remains (assuming we still
+# have to play at least _MIN_MOVES_LEFT moves, or half the empty cells):
+# no new iteration of deepening starts after the soft deadline, and the
+# search is abandoned at the hard deadline
+_TIME_BUDGET = lambda n: n**2
+_TIME_RESERVE = 0.05
+_MIN_MOVES_LEFT = 3
+_HARD_FACTOR = 3
+_HARD_MAX_SHARE = 0.5
+# Nodes searched between checks of the clock
+_CLOCK_INTERVAL = 256
+
+# The referee ends the game after this many turns. Search can add at most
+# one ply per empty cell to that, so the undo stack is sized for both
+_MAX_TURNS = 343
+
+# Principal variation search: width of the null windows used to test
+# moves after the first, and half-width of the root aspiration window
+# around the previous iteration's score
+_NULL_WINDOW = 1e-3
+_ASPIRATION_WINDOW = 2
+
+
+# Candidate moves are the empty cells within this distance of an occupied
+# cell (the whole board on n = 3), along with the empty corners on the
+# short diagonal
+_CANDIDATE_RADIUS = lambda n: 4 if n == 3 else 2
+
+# Cells within _CANDIDATE_RADIUS of each cell, keyed by board size n
+_NEARBY = {}
+
+
+def _nearby_cells(n):
+    """
+    For each cell index of an n board, the indices of the other cells within
+    _CANDIDATE_RADIUS of it.
+    """
+    nearby = _NEARBY.get(n)
+    if nearby is None:
+        cells = range(n * n)
+        radius = _CANDIDATE_RADIUS(n)
+        nearby = [tuple(j for j in distances(n, [i], cells, radius) if j != i)
+            for i in cells]
+        _NEARBY[n] = nearby
+    return nearby
+
+
+class _SearchTimeout(Exception):
+    """Raised inside search when the hard deadline has passed."""
+
+
+# Tracker to be searched by root-parallel search workers. Workers are forked
+# at the start of each move, so they inherit it in the root position
+_worker_tracker = None
+
+
+def _search_root_moves(task):
+    """
+    Worker task: search each of the given root moves of _worker_tracker to
+    depth with a full window. Returns their values along with the number of
+    nodes and evaluations searched, or None if the hard deadline passed.
+    """
+    depth, moves = task
+    board = _worker_tracker
+    board.nodes = board.evaluations = 0
+    board.nm_depth = depth
+    root_ply = board.ply
+    values = []
+    try:
+        for move in moves:
+            board.make_move(board.player, move)
+            values.append(-board.negamax_ab_tt(
+                depth - 1, _OPPONENT[board.player], -inf, inf
+            ))
+            board.undo_last_move()
+    except _SearchTimeout:
+        while board.ply > root_ply:
+            board.undo_last_move()
+        return None
+    return values, board.nodes, board.evaluations
+
+
+class FinalTracker(BitBoard):
+    __slots__ = (
+        "pvs", "workers", "evaluations", "nodes", "move_start",
+        "soft_deadline", "hard_deadline", "nm_depth", "depth_reached",
+        "total_evals", "total_time", "player", "evaluate",
+        "evaluate_children", "ply", "_stack_move", "_stack_player",
+        "_stack_captured", "_stack_keys", "tiles_captured", "start_squares",
+        "end_squares", "possible_moves", "_topology", "nearby",
+        "occupied_nearby", "corners", "bridge_replies", "prune_intrusions",
+        "connectivity", "transtbl", "history",
+        "killers", "z_table", "z_image", "z_rot", "z_rot_image", "z_side",
+        "zobrist", "zobrist_image", "zobrist_rot", "zobrist_rot_image",
+        "state_counter",
+    )
+
+    def __init__(self, player, evaluate, n, tt_budget_mb=None, pvs=False,
+            workers=0, evaluate_children=None, prune_intrusions=False):
         super().__init__(n)
+        self.pvs = pvs
+        # whether to prune replies to intrusions (see order_moves)
+        self.prune_intrusions = prune_intrusions
+        self.workers = workers
         self.evaluations = 0
+        self.nodes = 0
+        self.hard_deadline = inf
         self.total_evals = 0
         self.total_time = 0
         self.player = player
         self.evaluate = evaluate
+        # optional batch version of evaluate, taking the player to move and
+        # a list of their moves, and returning an array of evaluations (for
+        # that player) after each, or NaN where it can't evaluate a move
+        self.evaluate_children = evaluate_children
         self.n = n
-        self.move_history = []
+        # cells are tracked by index, r * n + q, throughout; moves are only
+        # converted to and from coordinates for the referee's actions
+        self.ply = 0
+        # undo stack, preallocated: for each ply, the move (a cell index or
+        # "STEAL"), who made it, a mask of the tiles it captured, and the
+        # four Zobrist keys from before it (see init_zobrist)
+        plies = _MAX_TURNS + n * n
+        self._stack_move = [None] * plies
+        self._stack_player = [None] * plies
+        self._stack_captured = [0] * plies
+        self._stack_keys = [0] * (4 * plies)
         self.tiles_captured = 0
         self.start_squares = {
-            "red": [(0, i) for i in range(n)],
-            "blue": [(i, 0) for i in range(n)]
+            "red": [i for i in range(n)],
+            "blue": [i * n for i in range(n)]
         }
         self.end_squares = {
-            "red": [(n - 1, i) for i in range(n)],
-            "blue": [(i, n - 1) for i in range(n)]
-        }
-        self.tiles = {
-            "red": set(),
-            "blue": set()
+            "red": [(n - 1) * n + i for i in range(n)],
+            "blue": [i * n + n - 1 for i in range(n)]
         }
+        # candidate moves, kept up to date by counting the occupied cells
+        # near each cell as stones are placed and removed
+        self.possible_moves = set()
+        self._topology = topology(n)
+        self.nearby = _nearby_cells(n)
+        self.occupied_nearby = [0] * (n * n)
+        self.corners = () if n == 3 else (n - 1, (n - 1) * n)
+        self.possible_moves.update(self.corners)
+        # bridges and edge templates an intrusion at each cell breaks
+        self.bridge_replies = bridge_table(n).replies
+        self.connectivity = Connectivity(n)
+        # parallel search workers share the transposition table
+        self.transtbl = (
+            TranspositionTable(shared=workers > 0) if tt_budget_mb is None else
+            TranspositionTable(tt_budget_mb, shared=workers > 0)
+        )
+        # move ordering: history scores by cell index, killers by depth
+        self.history = [0] * (n * n)
+        self.killers = dd(lambda: [None, None])
         self.init_zobrist()
 
     def update(self, player, action):
-        move = action_to_move(action)
-        if move == _ACTION_STEAL:
-            self.turn_swap(player)
-            last_captures = None
-        else:
-            last_captures = self.turn_place(player, move)
-        self.move_history.append((move, player, last_captures))
-
-    def turn_swap(self, player):
-        self.swap()
-        self.tiles_captured += (1 if player == self.player else -1)
-        tile = self.tiles[_OPPONENT[player]].pop()
-        self.tiles[player].add((tile[1], tile[0]))
-        self.update_zobrist(_OPPONENT[player], tile)
-        self.update_zobrist(player, (tile[1], tile[0]))
-        self.incr_state()
-
-    def turn_place(self, player, move):
-        last_captures = self.place(player, move)
-        self.update_zobrist(player, move)
-        self.tiles[player].add(move)
-        for captured_coord in last_captures:
-            self.tiles_captured += (1 if player == self.player else -1)
-            self.tiles[_OPPONENT[player]].remove(captured_coord)
-            self.update_zobrist(_OPPONENT[player], captured_coord)
-        self.incr_state()
-        return last_captures
-
-    def internal_update(self, player, action):
-        move = action_to_move(action)
+        self.make_move(player, action_to_move(action, self.n))
+
+    @property
+    def tiles(self):
+        """
+        Each colour's tiles, as sets of cell indices (read off the board's
+        masks, which are all that is kept up to date).
+        """
+        return {token: set(bit_indices(mask))
+            for token, mask in self._masks.items()}
+
+    def swap(self):
+        """
+        Swap the board, remapping the candidate moves through the same
+        static mirror table. The mirror preserves distances (and the
+        corners), so candidates stay candidates.
+        """
+        super().swap()
+        # the mirror is its own inverse
+        mirror = self._tables.symmetries[1]
+        mirrored = mirror.__getitem__
+        self.possible_moves = set(map(mirrored, self.possible_moves))
+        self.occupied_nearby = [self.occupied_nearby[j] for j in mirror]
+
+    def occupy(self, i):
+        """
+        Update candidate moves for a stone placed at cell i.
+        """
+        counts = self.occupied_nearby
+        occupied = self._masks["red"] | self._masks["blue"]
+        self.possible_moves.discard(i)
+        for j in self.nearby[i]:
+            counts[j] += 1
+            if counts[j] == 1 and not occupied >> j & 1:
+                self.possible_moves.add(j)
+
+    def vacate(self, i):
+        """
+        Update candidate moves for a stone removed from cell i.
+        """
+        counts = self.occupied_nearby
+        for j in self.nearby[i]:
+            counts[j] -= 1
+            if not counts[j] and j not in self.corners:
+                self.possible_moves.discard(j)
+        if counts[i] or i in self.corners:
+            self.possible_moves.add(i)
+
+    def make_move(self, player, move):
+        """
+        As update, but taking the move as a cell index (or
+        "STEAL") rather than an action, as search does.
+        """
+        ply = self.ply
+        self._stack_move[ply] = move
+        self._stack_player[ply] = player
+        keys = self._stack_keys
+        k = 4 * ply
+        keys[k] = self.zobrist
+        keys[k + 1] = self.zobrist_image
+        keys[k + 2] = self.zobrist_rot
+        keys[k + 3] = self.zobrist_rot_image
         if move == _ACTION_STEAL:
             self._swap(player)
-            last_captures = None
+            self._stack_captured[ply] = 0
         else:
-            last_captures = self._place(player, move)
-        self.move_history.append((move, player, last_captures))
+            self._stack_captured[ply] = self._place(player, move)
+        self.ply = ply + 1
 
     def undo_last_move(self):
-        move, player, last_captures = self.move_history.pop(-1)
+        ply = self.ply = self.ply - 1
+        move = self._stack_move[ply]
         if move == _ACTION_STEAL:
-            self.unswap(player)
+            self.unswap(self._stack_player[ply])
         else:
-            self.unplace(move, player, last_captures)
+            self.unplace(
+                move, self._stack_player[ply], self._stack_captured[ply]
+            )
+        # restore the keys rather than undo each change to them
+        keys = self._stack_keys
+        k = 4 * ply
+        self.zobrist = keys[k]
+        self.zobrist_image = keys[k + 1]
+        self.zobrist_rot = keys[k + 2]
+        self.zobrist_rot_image = keys[k + 3]
 
     def _swap(self, player):
         self.swap()
-        self.possible_moves = {(r, p) for p, r in self.possible_moves}
+        self.connectivity.swap()
         self.tiles_captured += (1 if player == self.player else -1)
-        tile = self.tiles[_OPPONENT[player]].pop()
-        self.tiles[player].add((tile[1], tile[0]))
-        self.update_zobrist(_OPPONENT[player], tile)
-        self.update_zobrist(player, (tile[1], tile[0]))
+        self.swap_zobrist()
         self.incr_state()
 
     def unswap(self, player):
         self.decr_state()
         self.swap()
-        self.possible_moves = {(r, p) for p, r in self.possible_moves}
+        self.connectivity.undo()
         self.tiles_captured -= (1 if player == self.player else -1)
-        tile = self.tiles[player].pop()
-        self.tiles[_OPPONENT[player]].add((tile[1], tile[0]))
-        self.update_zobrist(player, tile)
-        self.update_zobrist(_OPPONENT[player], (tile[1], tile[0]))
 
     def _place(self, player, move):
-        self.possible_moves.remove(move)
-        last_captures = self.place(player, move)
+        captured = self.place_at(player, move)
+        self.connectivity.place_at(player, move, captured)
         self.update_zobrist(player, move)
-        self.tiles[player].add(move)
-        for captured_coord in last_captures:
-            self.possible_moves.add(captured_coord)
-            self.tiles_captured += (1 if player == self.player else -1)
-            self.tiles[_OPPONENT[player]].remove(captured_coord)
-            self.update_zobrist(_OPPONENT[player], captured_coord)
+        self.occupy(move)
+        if captured:
+            for i in bit_indices(captured):
+                self.vacate(i)
+                self.tiles_captured += (1 if player == self.player else -1)
+                self.update_zobrist(_OPPONENT[player], i)
+        self.pass_turn_zobrist()
         self.incr_state()
-        return last_captures
+        return captured
 
-    def unplace(self, coord, player, last_captures):
+    def unplace(self, move, player, captured):
+        # Zobrist keys are restored by undo_last_move
         self.decr_state()
-        self[coord] = None
-        self.tiles[player].remove(coord)
-        self.possible_moves.add(coord)
-        self.update_zobrist(player, coord)
-        for captured_coord in last_captures:
-            self[captured_coord] = _OPPONENT[player]
-            self.tiles[_OPPONENT[player]].add(captured_coord)
-            self.possible_moves.remove(captured_coord)
-            self.tiles_captured -= (1 if player == self.player else -1)
-            self.update_zobrist(_OPPONENT[player], captured_coord)
+        self.connectivity.undo()
+        self.set_at(move, None)
+        self.vacate(move)
+        if captured:
+            self._masks[_OPPONENT[player]] |= captured
+            for i in bit_indices(captured):
+                self.occupy(i)
+                self.tiles_captured -= (1 if player == self.player else -1)
 
     def get_greedy_move(self):
         moves = list(self.possible_moves)
@@ -155,7 +323,7 @@ class FinalTracker(Board):
         )
 
     def evaluate_after_move(self, move):
-        self.internal_update(self.player, move_to_action(move))
+        self.make_move(self.player, move)
         value = self.evaluate(self.player)
         self.undo_last_move()
         return value
@@ -167,94 +335,329 @@ class FinalTracker(Board):
             return 0
         eval = self.evaluate(player)
         if eval == _WIN_VALUE:
-            return eval - len(self.move_history)
+            return eval - self.ply
         if eval == -_WIN_VALUE:
-            return eval + len(self.move_history)
+            return eval + self.ply
         return eval
 
-    def get_nm_depth(self):
-        perc_time = (self.total_time + timer() - self.move_start) / self.n**2
-        key = self.n
-        if key in depth_dict:
-            # smaller boards we can go a bit deeper
-            base = depth_dict[key]
-            if perc_time > 0.97:
-                return 0, .97
-            elif perc_time > 0.85:
-                return base - 2, .85
-            elif perc_time > 0.70:
-                return base - 1, .70
-        else:
-            # larger boards stick to depth of 3
-            base = 3
-            if perc_time > 0.97:
-                print("OUT OF TIME")
-                return 0, .97
-            elif perc_time > 0.75:
-                return base - 1, .75
-        return base, None
+    def set_deadlines(self):
+        """
+        Set the soft and hard deadlines for this move from the remaining
+        time budget and number of empty cells. Returns False if there is no
+        time left to search at all.
+        """
+        budget = _TIME_BUDGET(self.n) * (1 - _TIME_RESERVE)
+        remaining = budget - self.total_time - (timer() - self.move_start)
+        if remaining <= 0:
+            return False
+        occupied = self._masks["red"] | self._masks["blue"]
+        empty = self.n**2 - bin(occupied).count("1")
+        soft = remaining / max(empty / 2, _MIN_MOVES_LEFT)
+        hard = min(soft * _HARD_FACTOR, remaining * _HARD_MAX_SHARE)
+        self.soft_deadline = self.move_start + soft
+        self.hard_deadline = self.move_start + hard
+        return True
+
+    def iterative_deepening(self):
+        """
+        Search to increasing depths until the soft deadline passes (or a
+        forced result is found), returning the best move from the deepest
+        completed search, or None if not even depth 1 completed.
+        """
+        self.new_search()
+        root_ply = self.ply
+        pool = self.start_workers() if self.workers else None
+        best_move = None
+        score = None
+        try:
+            for depth in range(1, len(self.possible_moves) + 1):
+                try:
+                    if pool is not None:
+                        score, best_move = self.parallel_search_root(
+                            depth, pool
+                        )
+                    elif self.pvs and score is not None:
+                        score, best_move = self.aspiration_search(
+                            depth, score
+                        )
+                    else:
+                        score, best_move = self.search_root(depth)
+                except _SearchTimeout:
+                    # unwind the abandoned search back to the root
+                    while self.ply > root_ply:
+                        self.undo_last_move()
+                    break
+                self.depth_reached = depth
+                if abs(score) >= _WIN_VALUE / 2 or \
+                        timer() > self.soft_deadline:
+                    break
+        finally:
+            if pool is not None:
+                pool.terminate()
+        return best_move
+
+    def start_workers(self):
+        """
+        Fork a pool of root-parallel search workers, each with its own copy
+        of this tracker (in the current position) but sharing the
+        transposition table.
+        """
+        global _worker_tracker
+        _worker_tracker = self
+        return multiprocessing.get_context("fork").Pool(self.workers)
+
+    def parallel_search_root(self, depth, pool):
+        """
+        As search_root, but splitting the root moves between the workers in
+        pool. Results are merged in move order, so ties always go to the
+        same (earliest ordered) move.
+        """
+        self.nm_depth = depth
+        key, symmetry = self.tt_key()
+        entry = self.transtbl.probe(key)
+        tt_move = None
+        if entry is not None and entry[3] is not None:
+            tt_move = self._tables.symmetries[symmetry][entry[3]]
+        moves = self.order_moves(depth, tt_move)
+        tasks = [(depth, moves[i::self.workers]) for i in range(self.workers)]
+        results = pool.map(_search_root_moves, tasks)
+        values = {}
+        for (_, task_moves), result in zip(tasks, results):
+            if result is None:
+                raise _SearchTimeout()
+            task_values, nodes, evaluations = result
+            self.nodes += nodes
+            self.evaluations += evaluations
+            values.update(zip(task_moves, task_values))
+
+        best_move = moves[0]
+        for move in moves:
+            if values[move] > values[best_move]:
+                best_move = move
+        to_canonical = self._tables.symmetries[symmetry]
+        self.transtbl.store(
+            key, values[best_move], depth, EXACT, to_canonical[best_move]
+        )
+        return values[best_move], best_move
 
     def time_to_steal(self):
         if self.n == 3:
-            last_tile = self.move_history[0][0]
-            return last_tile in [(0, 2), (0, 1), (2, 0), (2, 1)]
+            # (0, 1), (0, 2), (2, 0) or (2, 1)
+            last_tile = self._stack_move[0]
+            return last_tile in [1, 2, 6, 7]
         if self.n == 4:
             return False
         return True
 
     def get_first_move(self):
+        # (1, 0) on n = 3, and (n - 1, 0) otherwise
         if self.n == 3:
-            return 1, 0
+            return 3
         else:
-            return self.n - 1, 0
+            return (self.n - 1) * self.n
+
+    def tablebase_move(self):
+        """
+        The tablebase's (exact) best move for the current position, or None
+        if there is no table for this board size. The table assumes the
+        position hasn't occurred before, so it isn't used once positions
+        start repeating.
+        """
+        table = load_tablebase(self.n)
+        if table is None or self.state_count() > 1:
+            return None
+        entry = table.lookup(
+            self._masks["red"], self._masks["blue"], self.player == "red"
+        )
+        if entry is None:
+            return None
+        _, move = entry
+        if move == self.n * self.n:
+            return _ACTION_STEAL
+        return move
+
+    def book_move(self):
+        """
+        The opening book's move for the current position, or None if it
+        isn't in the book or wasn't searched deeper than live search would.
+        """
+        book = load_book(self.n, ZOBRIST_SEED)
+        if book is None:
+            return None
+        key, symmetry = self.tt_key()
+        entry = book.lookup(key)
+        if entry is None:
+            return None
+        move, depth = entry
+        if depth <= _LIVE_DEPTH(self.n):
+            return None
+        if move == STEAL_INDEX:
+            return _ACTION_STEAL if self.ply == 1 else None
+        move = self._tables.symmetries[symmetry][move]
+        occupied = self._masks["red"] | self._masks["blue"]
+        return None if occupied >> move & 1 else move
+
+    def candidate_moves(self):
+        """
+        Moves worth searching: empty cells near occupied ones, and the
+        empty corners on the short diagonal (a copy of possible_moves).
+        """
+        return set(self.possible_moves)
 
     def get_transtbl_move(self):
         self.move_start = timer()
 
-        if len(self.move_history) == 0:
+        move = self.tablebase_move()
+        if move is None:
+            move = self.book_move()
+        if move is not None:
+            return move
+        if self.ply == 0:
             return self.get_first_move()
-        if len(self.move_history) == 1:
+        if self.ply == 1:
             if self.time_to_steal():
                 return _ACTION_STEAL
 
-        self.nm_depth, perc = self.get_nm_depth()
-        if perc: print(perc)
-        if self.nm_depth <= 0:
+        if not self.set_deadlines():
             return self.get_greedy_move()
         self.evaluations = 0
         
-        # manage moves
-        if self.n == 3:
-            self.possible_moves = self.get_occupied_neighbours(max_depth=4)
-        else:
-            self.possible_moves = self.get_occupied_neighbours()
-            for corner in [(0, self.n-1), (self.n-1, 0)]:
-                if not self[corner]:
-                    self.possible_moves.add(corner)
-        self.transtbl = dict()
-        score, best_move = self.negamax_ab_tt(
-            self.nm_depth, self.player, -inf, inf
-        )
+        if len(self.possible_moves) == 1:
+            return next(iter(self.possible_moves))
+        best_move = self.iterative_deepening()
 
         self.total_evals += self.evaluations
-        # print(f"{score = }")
-        # print(self.state_count())
-        # print(f"Evals: {self.evaluations}")
-        # print(f"Time: {self.total_time + (timer() - start_time)}\n")
+        if best_move is None:
+            return self.get_greedy_move()
         return best_move
 
 
+    def new_search(self):
+        """
+        Prepare search state for a new move.
+        """
+        self.transtbl.new_search()
+        self.killers.clear()
+        # age history scores so earlier moves' cutoffs count for less
+        self.history = [score >> 1 for score in self.history]
+        self.depth_reached = 0
+
+    def search_root(self, depth, alpha=-inf, beta=inf):
+        """
+        Search the current position to the given depth, returning the
+        (score, best move) for self.player.
+        """
+        self.nm_depth = depth
+        return self.negamax_ab_tt(depth, self.player, alpha, beta)
+
+    def aspiration_search(self, depth, guess):
+        """
+        Search the root with a narrow window around guess (the previous
+        iteration's score), re-searching with a full window if the score
+        falls outside it.
+        """
+        alpha = guess - _ASPIRATION_WINDOW
+        beta = guess + _ASPIRATION_WINDOW
+        score, best_move = self.search_root(depth, alpha, beta)
+        if score <= alpha or score >= beta:
+            score, best_move = self.search_root(depth)
+        return score, best_move
+
+    def forced_replies(self):
+        """
+        Cells the player to move must place at to answer the last move,
+        if it intruded into one of their bridges or edge templates (see
+        slips_and_falls.utils.bridges), in table order.
+        """
+        ply = self.ply
+        if not ply:
+            return []
+        move = self._stack_move[ply - 1]
+        if move == _ACTION_STEAL:
+            return []
+        player = _OPPONENT[self._stack_player[ply - 1]]
+        own = self._masks[player]
+        occupied = own | self._masks[_OPPONENT[player]]
+        forced = []
+        for ends, reply in self.bridge_replies[player][move]:
+            if own & ends == ends and not occupied >> reply & 1:
+                if reply not in forced:
+                    forced.append(reply)
+        return forced
+
+    def captures_available(self, player, moves):
+        """
+        Those of moves which would capture for player.
+        """
+        own = self._masks[player]
+        opp = self._masks[_OPPONENT[player]]
+        captures = self._tables.captures
+        return [move for move in moves if any(
+            own & opp_bit and opp & mid_bits == mid_bits
+            for opp_bit, mid_bits in captures[move]
+        )]
+
+    def order_moves(self, depth, tt_move):
+        """
+        Order candidate moves for searching: the transposition table's best
+        move first, then forced replies to an intrusion into a bridge or
+        edge template, then killer moves from this depth, then the rest by
+        history score and number of occupied neighbours.
+
+        Below the root (if prune_intrusions is set), the replies to an
+        intrusion are pruned to the forced ones, the moves which capture
+        and the transposition table's move: anything else gives up the
+        connection, and for a bridge, the two tiles to a capture.
+        """
+        forced = self.forced_replies()
+        if forced and self.prune_intrusions and depth < self.nm_depth:
+            player = _OPPONENT[self._stack_player[self.ply - 1]]
+            first = [tt_move] if tt_move in self.possible_moves else []
+            for move in forced + self.captures_available(
+                    player, sorted(self.possible_moves)):
+                if move not in first:
+                    first.append(move)
+            return first
+        history = self.history
+        moves = sorted(
+            self.possible_moves,
+            key=lambda m: (-history[m], -self.num_neighbors(m), m)
+        )
+        first = []
+        if tt_move is not None:
+            first.append(tt_move)
+        for move in forced:
+            if move not in first:
+                first.append(move)
+        for killer in self.killers[depth]:
+            if killer not in first:
+                first.append(killer)
+        first = [move for move in first if move in self.possible_moves]
+        if first:
+            moves = first + [move for move in moves if move not in first]
+        return moves
+
     def negamax_ab_tt(self, depth: int, player, alpha: float, beta: float):
         alpha_orig = alpha
+        self.nodes += 1
+        if not self.nodes % _CLOCK_INTERVAL and timer() > self.hard_deadline:
+            raise _SearchTimeout()
         
-        if self.zobrist in self.transtbl:
-            tt_val, tt_depth, tt_flag = self.transtbl[self.zobrist]
-            if tt_depth >= depth:    
-                if tt_flag == "E":
+        # the root must be searched to find a move, even if a previous
+        # move's search stored this position
+        key, symmetry = self.tt_key()
+        entry = self.transtbl.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_val, tt_depth, tt_flag, tt_move = entry
+            if tt_move is not None:
+                tt_move = self._tables.symmetries[symmetry][tt_move]
+            if tt_depth >= depth and depth < self.nm_depth:
+                if tt_flag == EXACT:
                     return tt_val
-                elif tt_flag == "L":
+                elif tt_flag == LOWER:
                     alpha = max(alpha, tt_val)
-                elif tt_flag == "U":
+                elif tt_flag == UPPER:
                     beta = min(beta, tt_val)
                 
                 if alpha >= beta:
@@ -266,94 +669,175 @@ class FinalTracker(Board):
         
         value = -inf
         best_move = None
-        heap = [(-self.num_neighbors(move), move) for move in self.possible_moves]
-        heapq.heapify(heap)
-        while heap:
-            move = heapq.heappop(heap)[1]
-            self.internal_update(player, move_to_action(move))
-            node_value = -self.negamax_ab_tt(
-                depth - 1, _OPPONENT[player], -beta, -alpha
-            )
+        moves = self.order_moves(depth, tt_move)
+        # at depth 1, if the first move doesn't cause a cutoff (as it
+        # usually would if there is one), evaluate the rest together
+        batch = depth == 1 and self.evaluate_children is not None
+        frontier = None
+        for i, move in enumerate(moves):
+            if batch and i == 1:
+                frontier = self.frontier_values(player, moves[1:])
+            if frontier is not None:
+                node_value = frontier[i - 1]
+            else:
+                self.make_move(player, move)
+                if self.pvs and best_move is not None:
+                    # prove this move is no better than the best so far with
+                    # a null window, only searching it fully if that fails
+                    node_value = -self.negamax_ab_tt(
+                        depth - 1, _OPPONENT[player],
+                        -alpha - _NULL_WINDOW, -alpha
+                    )
+                    if alpha < node_value < beta:
+                        node_value = -self.negamax_ab_tt(
+                            depth - 1, _OPPONENT[player], -beta, -alpha
+                        )
+                else:
+                    node_value = -self.negamax_ab_tt(
+                        depth - 1, _OPPONENT[player], -beta, -alpha
+                    )
+                self.undo_last_move()
             value = max(value, node_value)
             if node_value > alpha or best_move is None:
                 alpha = node_value
                 best_move = move
-            self.undo_last_move()
             if alpha >= beta:
+                killers = self.killers[depth]
+                if move != killers[0]:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                self.history[move] += depth * depth
                 break
 
         if value <= alpha_orig:
-            tt_flag = "U"
+            tt_flag = UPPER
         elif value >= beta:
-            tt_flag = "L"
+            tt_flag = LOWER
         else:
-            tt_flag = "E"
-        self.transtbl[self.zobrist] = (value, depth, tt_flag)
+            tt_flag = EXACT
+        to_canonical = self._tables.symmetries[symmetry]
+        self.transtbl.store(
+            key, value, depth, tt_flag,
+            None if best_move is None else to_canonical[best_move]
+        )
         return alpha if depth < self.nm_depth else (alpha, best_move)
 
+    def frontier_values(self, player, moves):
+        """
+        Values (for player, to move) of each of the given moves from a
+        depth 1 node, as searching each to depth 0 would give, found with
+        evaluate_children. Moves it can't evaluate are made and evaluated
+        one at a time.
+        """
+        if timer() > self.hard_deadline:
+            raise _SearchTimeout()
+        self.nodes += len(moves)
+        self.evaluations += len(moves)
+        colour = 0 if player == "red" else 1
+        ply = self.ply + 1
+        values = []
+        scores = self.evaluate_children(player, moves).tolist()
+        for move, score in zip(moves, scores):
+            if score != score:
+                self.make_move(player, move)
+                values.append(-self.evaluation_wrapper(_OPPONENT[player]))
+                self.undo_last_move()
+                continue
+            # draw if the move repeats a position for the 7th time
+            key = self.zobrist ^ self.z_table[move][colour] ^ self.z_side
+            if self.state_counter.get(key, 0) >= 6:
+                values.append(0)
+            elif score == _WIN_VALUE:
+                values.append(score - ply)
+            else:
+                values.append(score)
+        return values
+
     def game_over(self):
-        if longest_edge_branch(self, self.player, from_start=True) == self.n:
+        if self.connectivity.connected(self.player):
             return self.player
-        elif longest_edge_branch(self, _OPPONENT[self.player], from_start=True) == self.n:
+        elif self.connectivity.connected(_OPPONENT[self.player]):
             return _OPPONENT[self.player]
         return self.state_count() >= 7
 
     def num_neighbors(self, move):
-        neighbors = 0
-        for dx, dy in _NEIGHBOUR_OFFSETS:
-            x = move[0] + dx
-            y = move[1] + dy
-            if (0 <= x < self.n and 0 <= y < self.n and self[(x, y)]):
-                neighbors += 1
-        return neighbors
-
-    def get_occupied_neighbours(self, max_depth=2):
-        q = Queue(maxsize = self.n**2)
-        seen = set()
-        neighbours = set()
-        # start with currently occupied squares as depth 0
-        for tile in self.tiles[self.player]:
-            q.put((tile, 0))
-            seen.add(tile)
-        for tile in self.tiles[_OPPONENT[self.player]]:
-            q.put((tile, 0))
-            seen.add(tile)
-        # then do BFS up do depth = max_depth
-        while not q.empty():
-            (x, y), depth = q.get()
-            for dx, dy in _NEIGHBOUR_OFFSETS:
-                nbr = x+dx, y+dy
-                if (
-                    depth < max_depth and 
-                    nbr not in seen and
-                    0 <= nbr[0] < self.n and 0 <= nbr[1] < self.n and 
-                    not self[nbr]
-                    ):
-                        seen.add(nbr)
-                        neighbours.add(nbr)
-                        if depth + 1 < max_depth:
-                            q.put((nbr, depth + 1))
-        return neighbours
+        occupied = self._masks["red"] | self._masks["blue"]
+        return bin(self._topology.neighbour_masks[move] & occupied).count("1")
 
     def init_zobrist(self):
-        self.z_table = []
-        for _ in range(self.n):
-            row = []
-            for _ in range(self.n):
-                row.append([random.getrandbits(64), random.getrandbits(64)])
-            self.z_table.append(row)
-        self.zobrist = 0
+        """
+        Set up Zobrist hashing. Alongside the position's key, we keep the keys
+        of its images under the board's symmetries:
+        * swap (tiles mirrored along the major axis, with colours and the
+          player to move exchanged), so a swap is just an exchange of keys,
+          whatever is on the board,
+        * 180 degree rotation, and
+        * rotation combined with swap.
+        Transposition table entries are shared between symmetric positions
+        by keying them on the smallest of the four (see tt_key).
+        """
+        n = self.n
+        rng = random.Random(ZOBRIST_SEED + n)
+        self.z_table = [[rng.getrandbits(64), rng.getrandbits(64)]
+            for _ in range(n * n)]
+        z = self.z_table
+        # key of tile i of each colour in each image (its image under the
+        # symmetry, with colours exchanged by swap)
+        _, mirror, rot, rot_mirror = self._tables.symmetries
+        self.z_image = [[z[j][1], z[j][0]] for j in mirror]
+        self.z_rot = [[z[j][0], z[j][1]] for j in rot]
+        self.z_rot_image = [[z[j][1], z[j][0]] for j in rot_mirror]
+        # toggled whenever the turn passes (included while blue is to move)
+        self.z_side = rng.getrandbits(64)
+        self.zobrist = self.zobrist_rot = 0
+        self.zobrist_image = self.zobrist_rot_image = self.z_side
         self.state_counter = dd(int)
         self.incr_state()
     
     def update_zobrist(self, player, tile):
-        self.zobrist ^= self.z_table[tile[0]][tile[1]][0 if player == "red" else 1] 
+        colour = 0 if player == "red" else 1
+        self.zobrist ^= self.z_table[tile][colour]
+        self.zobrist_image ^= self.z_image[tile][colour]
+        self.zobrist_rot ^= self.z_rot[tile][colour]
+        self.zobrist_rot_image ^= self.z_rot_image[tile][colour]
+
+    def pass_turn_zobrist(self):
+        self.zobrist ^= self.z_side
+        self.zobrist_image ^= self.z_side
+        self.zobrist_rot ^= self.z_side
+        self.zobrist_rot_image ^= self.z_side
+
+    def swap_zobrist(self):
+        self.zobrist, self.zobrist_image = self.zobrist_image, self.zobrist
+        self.zobrist_rot, self.zobrist_rot_image = (
+            self.zobrist_rot_image, self.zobrist_rot
+        )
+
+    def tt_key(self):
+        """
+        Canonical transposition table key for the position (the same for
+        all of its symmetric images), and the index of the symmetry (see
+        BitBoard's symmetry tables) taking this position to the canonical
+        one. Moves are stored in the canonical position's frame.
+        """
+        keys = (
+            self.zobrist, self.zobrist_image,
+            self.zobrist_rot, self.zobrist_rot_image
+        )
+        key = min(keys)
+        return key, keys.index(key)
 
     def state_count(self):
-        return self.state_counter[self.zobrist]
+        return self.state_counter.get(self.zobrist, 0)
 
     def incr_state(self):
         self.state_counter[self.zobrist] += 1
     
     def decr_state(self):
-        self.state_counter[self.zobrist] -= 1
+        # drop positions search has left, so the counter doesn't grow with
+        # every node searched
+        count = self.state_counter[self.zobrist] - 1
+        if count:
+            self.state_counter[self.zobrist] = count
+        else:
+            del self.state_counter[self.zobrist]
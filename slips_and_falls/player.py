@@ -1,4 +1,7 @@
-from slips_and_falls.utils.heuristics import edge_branch_capture_eval
+from slips_and_falls.utils.heuristics import (
+    edge_branch_capture_eval, edge_branch_capture_children
+)
+from slips_and_falls.utils.evaluation import WeightedEvaluation
 from slips_and_falls.utils.template_player import TemplatePlayer
 
 
@@ -16,3 +19,70 @@ class Player(TemplatePlayer):
 
     def evaluate(self, player):
         return edge_branch_capture_eval(self.tracking_board, player)
+
+    def evaluate_children(self, player, moves):
+        return edge_branch_capture_children(self.tracking_board, player, moves)
+
+
+class PVSPlayer(Player):
+    def __init__(self, player, n):
+        """
+        As Player, but searching with principal variation search and
+        aspiration windows rather than plain alpha-beta. Load it in the
+        referee with e.g. 'slips_and_falls:PVSPlayer'.
+        """
+        TemplatePlayer.__init__(self, player, n, "pvs", "edge_branch_capture")
+
+
+class ParallelPlayer(Player):
+    def __init__(self, player, n):
+        """
+        As Player, but splitting the search at the root between one worker
+        process per CPU. This is for offline analysis and self-play only:
+        the referee's CPU time limit does not allow for it in tournaments.
+        """
+        TemplatePlayer.__init__(
+            self, player, n, "parallel", "edge_branch_capture"
+        )
+
+
+class PrunedPlayer(Player):
+    def __init__(self, player, n):
+        """
+        As Player, but pruning the replies to an intrusion into one of its
+        (or its opponent's) bridges or edge templates to the forced ones
+        and captures below the root. Load it in the referee with
+        'slips_and_falls:PrunedPlayer'.
+        """
+        TemplatePlayer.__init__(
+            self, player, n, "pruned", "edge_branch_capture"
+        )
+
+
+class WeightedPlayer(TemplatePlayer):
+    # evaluation kernel weights (see slips_and_falls.utils.evaluation), for
+    # subclasses to override. These match Player's evaluation
+    weights = {"edge_branch": 1, "captures": 1}
+
+    def __init__(self, player, n):
+        """
+        As Player, but evaluating with a weighted sum of registered
+        evaluation kernels, so that other evaluations only need different
+        weights rather than their own functions. Load it in the referee
+        with e.g. 'slips_and_falls:WeightedPlayer'.
+        """
+        super().__init__(player, n, "transtbl", "weighted")
+        self.evaluation = WeightedEvaluation(self.weights)
+
+    def evaluate(self, player):
+        return self.evaluation(self.tracking_board, player)
+
+
+class ShortestPathPlayer(WeightedPlayer):
+    """
+    WeightedPlayer evaluating by connection distance (how many fewer empty
+    cells it needs to join its edges than its opponent) rather than edge
+    branches. Load it in the referee with
+    'slips_and_falls:ShortestPathPlayer'.
+    """
+    weights = {"shortest_path": 1, "captures": 1}
@@ -0,0 +1,180 @@
+"""
+Build opening books (see slips_and_falls.utils.opening_book) offline, by
+searching the first plies of the game well past the depth live search
+reaches. For each board size the book holds:
+
+* the first move (weighing each against both the opponent's replies and
+  stealing it),
+* the reply to each possible first move by the opponent, including
+  whether to steal it, and
+* the reply to each of the opponent's answers to the player's first move
+  (the book's, or its usual one if the book has none).
+
+Each position is searched by iterative deepening until it reaches
+_BOOK_MARGIN plies past live search's depth (_LIVE_DEPTH), or runs out of
+its time budget. Positions that don't get that deep are left out, and so is
+the book for a board size if none of them do.
+
+Usage: python -m slips_and_falls.utils.book_builder [n ...]
+"""
+
+import os
+import sys
+from math import inf
+from time import perf_counter as timer
+
+from slips_and_falls.player import Player
+from slips_and_falls.final_tracker import (
+    ZOBRIST_SEED, _ACTION_STEAL, _LIVE_DEPTH, _SearchTimeout
+)
+from slips_and_falls.utils.opening_book import (
+    BOOK_DIR, STEAL_INDEX, write_book
+)
+
+# Board sizes built by default. Past n = 6, positions take too long to
+# search _BOOK_MARGIN plies past live search for a book to be practical
+_SIZES = range(3, 7)
+
+# Plies past _LIVE_DEPTH each position must be searched to, and the time
+# budget (seconds) for searching it
+_BOOK_MARGIN = 2
+_POSITION_BUDGET = 600
+
+_OPPONENT = {"red": "blue", "blue": "red"}
+
+
+def root_actions(board):
+    """
+    Actions to consider for the player to move: every (rotationally
+    distinct) cell on the empty board other than the centre, which the
+    rules forbid, and otherwise the tracker's usual candidate moves, plus
+    stealing on the second ply.
+    """
+    n = board.n
+    ply = board.ply
+    if ply == 0:
+        # i < n * n - 1 - i is (r, q) < (n - 1 - r, n - 1 - q)
+        return [i for i in range(n * n) if i < n * n - 1 - i]
+    moves = sorted(board.candidate_moves())
+    return moves + [_ACTION_STEAL] if ply == 1 else moves
+
+
+def search_value(board, player, depth, alpha, beta):
+    """
+    Value of the current position for player (to move), searched to depth.
+    The first two plies of the game are searched move by move rather than
+    with negamax_ab_tt, so that stealing is considered.
+    """
+    if board.ply < 2 and depth > 0:
+        return best_action(board, player, depth, alpha, beta)[0]
+    return board.negamax_ab_tt(depth, player, alpha, beta)
+
+
+def best_action(board, player, depth, alpha=-inf, beta=inf):
+    """
+    Search each action for player (to move) to depth, returning the best
+    (value, action).
+    """
+    # keep negamax_ab_tt returning bare values at every depth
+    board.nm_depth = inf
+    actions = root_actions(board)
+    best = (-inf, None)
+    for action in actions:
+        board.make_move(player, action)
+        value = -search_value(
+            board, _OPPONENT[player], depth - 1, -beta, -alpha
+        )
+        board.undo_last_move()
+        if value > best[0]:
+            best = (value, action)
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    return best
+
+
+def deepen(board, player, target):
+    """
+    Search the current position by iterative deepening, up to depth target
+    or until _POSITION_BUDGET runs out, returning the best action from the
+    deepest completed search and its depth.
+    """
+    board.new_search()
+    board.hard_deadline = timer() + _POSITION_BUDGET
+    root_ply = board.ply
+    action, reached = None, 0
+    try:
+        for depth in range(1, target + 1):
+            _, action = best_action(board, player, depth)
+            reached = depth
+    except _SearchTimeout:
+        while board.ply > root_ply:
+            board.undo_last_move()
+    board.hard_deadline = inf
+    return action, reached
+
+
+def add_entry(book, board, player, target):
+    """
+    Search the current position and add its best action to book, unless
+    it (or a symmetric position) is already there or the search doesn't
+    reach depth target. Returns the action added, if any.
+    """
+    key, symmetry = board.tt_key()
+    if key in book:
+        return None
+    action, depth = deepen(board, player, target)
+    if depth < target:
+        return None
+    if action == _ACTION_STEAL:
+        book[key] = (STEAL_INDEX, depth)
+    else:
+        book[key] = (board._tables.symmetries[symmetry][action], depth)
+    return action
+
+
+def build_book(n, target):
+    """
+    Build the book for board size n, searching each position to depth
+    target, returning it as a dict of entries.
+    """
+    book = {}
+    red = Player("red", n).tracking_board
+    blue = Player("blue", n).tracking_board
+
+    first = add_entry(book, red, "red", target)
+    for i in range(n * n):
+        blue.make_move("red", i)
+        add_entry(book, blue, "blue", target)
+        blue.undo_last_move()
+
+    # without a book move, the player opens as usual
+    if first is None:
+        first = red.get_first_move()
+    red.make_move("red", first)
+    replies = [i for i in range(n * n) if i != first] + [_ACTION_STEAL]
+    for reply in replies:
+        red.make_move("blue", reply)
+        add_entry(book, red, "red", target)
+        red.undo_last_move()
+    return book
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or _SIZES
+    os.makedirs(BOOK_DIR, exist_ok=True)
+    for n in sizes:
+        target = _LIVE_DEPTH(n) + _BOOK_MARGIN
+        path = os.path.join(BOOK_DIR, f"{n}.book")
+        start = timer()
+        book = build_book(n, target)
+        if book:
+            write_book(path, n, ZOBRIST_SEED, book)
+        elif os.path.exists(path):
+            os.remove(path)
+        print(f"n={n}: {len(book)} positions at depth {target} "
+            f"in {timer() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Bridge and edge template patterns for each board size, for move generation.
+
+A bridge is two tiles a and b which are not neighbours but share two empty
+neighbours x and y (the carrier): if the opponent intrudes at one carrier
+cell, placing at the other keeps a and b connected. In Cachex the intrusion
+threatens more than the connection. The bridge is a sideways diamond of
+_CAPTURE_PATTERNS (see referee.board), so if the intrusion is left alone,
+the opponent placing at the other carrier cell captures both a and b.
+Bridges are found from those diamonds here, so the two always agree.
+
+An edge template (template II) is a tile a one row from its own edge, whose
+two neighbours x and y on the edge are empty: an intrusion at one is
+answered at the other, keeping a connected to the edge. Its diamonds run
+off the board, so it can't be captured, only cut off.
+
+Either way, the reply to an intrusion is forced (see FinalTracker's
+forced_replies). For each colour and cell x, the table holds the patterns
+an intrusion at x breaks, as (ends, y) pairs: the mask of the tiles the
+colour must hold (a and b, or just a), and the cell y to reply at.
+"""
+
+from referee.board import _ADD, _CAPTURE_PATTERNS, _HEX_STEPS
+from referee.topology import topology
+
+# Built tables, keyed by board size n
+_TABLES = {}
+
+
+class _BridgeTable:
+    def __init__(self, n):
+        self.n = n
+        topo = topology(n)
+        index = topo.index
+        replies = {"red": [[] for _ in range(topo.size)],
+            "blue": [[] for _ in range(topo.size)]}
+
+        # bridges: for each carrier cell x of a sideways diamond, the other
+        # carrier cell y and the ends a and b
+        steps = [tuple(step) for step in _HEX_STEPS]
+        sideways = [pattern for pattern in _CAPTURE_PATTERNS
+            if tuple(pattern[0]) in steps]
+        for x, coord in enumerate(topo.coords):
+            for pattern in sideways:
+                y, a, b = [index.get(_ADD(coord, step)) for step in pattern]
+                if y is None or a is None or b is None:
+                    continue
+                for token in replies:
+                    replies[token][x].append((1 << a | 1 << b, y))
+
+        # edge templates: tiles one row from an edge with two neighbours
+        # on it
+        for token in replies:
+            for edge in (topo.start_masks[token], topo.end_masks[token]):
+                for a in range(topo.size):
+                    on_edge = [j for j in topo.neighbours[a] if edge >> j & 1]
+                    if edge >> a & 1 or len(on_edge) != 2:
+                        continue
+                    x, y = on_edge
+                    replies[token][x].append((1 << a, y))
+                    replies[token][y].append((1 << a, x))
+
+        self.replies = {token: tuple(map(tuple, cells))
+            for token, cells in replies.items()}
+
+
+def bridge_table(n):
+    """
+    Get (building if necessary) the bridge and edge template table for
+    board size n.
+    """
+    table = _TABLES.get(n)
+    if table is None:
+        table = _TABLES[n] = _BridgeTable(n)
+    return table
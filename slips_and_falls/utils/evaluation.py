@@ -0,0 +1,181 @@
+"""
+Registry of evaluation kernels, which can be combined with weights into one
+evaluation function (see WeightedEvaluation).
+
+Kernels which only depend on which cells each player holds (axis, centre
+and edges advantage) count the cells of some kind held by the player to
+evaluate for, less those held by their opponent. Each is registered as a
+function of n giving the weight of every cell. A weighted sum of them is
+then a single array of weights, applied to the board as a NumPy array of
+bits (see board_planes) in one dot product, however many are combined.
+
+Kernels which depend on more than the cells (edge branches, shortest paths
+and captures) read the tracker's state instead: its incrementally
+maintained connectivity and capture count, and its bitboard masks, which
+are cheaper to search than the board array.
+"""
+
+import numpy as np
+
+from slips_and_falls.utils.heuristics import (
+    captures, edge_branch_eval, shortest_path_eval, _EVEN_CENTRE_TILES,
+    _WIN_VALUE
+)
+from referee.topology import topology
+
+_OPPONENT = {"red": "blue", "blue": "red"}
+
+# Linear kernels: for each, a function of n returning the weight of each
+# cell (indexed r * n + q) as an array
+CELL_KERNELS = {}
+
+# Other kernels: for each, a function of the tracker and the player to
+# evaluate for. These may find wins (or losses), returned as +/-_WIN_VALUE
+STATE_KERNELS = {}
+
+
+def cell_kernel(name):
+    """
+    Register a linear kernel under name.
+    """
+    def register(cell_weights):
+        CELL_KERNELS[name] = cell_weights
+        return cell_weights
+    return register
+
+
+def state_kernel(name):
+    """
+    Register a kernel of the tracker's state under name.
+    """
+    def register(kernel):
+        STATE_KERNELS[name] = kernel
+        return kernel
+    return register
+
+
+def kernel_names():
+    return list(STATE_KERNELS) + list(CELL_KERNELS)
+
+
+@state_kernel("edge_branch")
+def edge_branch(tracking_board, player):
+    return edge_branch_eval(tracking_board, player)
+
+
+@state_kernel("shortest_path")
+def shortest_path(tracking_board, player):
+    return shortest_path_eval(tracking_board, player)
+
+
+@state_kernel("captures")
+def captures_kernel(tracking_board, player):
+    return captures(tracking_board, player)
+
+
+@cell_kernel("axis_advantage")
+def axis_weights(n):
+    """
+    Cells within one of the short diagonal (r + q = n - 1).
+    """
+    r, q = np.divmod(np.arange(n * n), n)
+    return (abs(r + q - (n - 1)) < 2).astype(float)
+
+
+@cell_kernel("centre_advantage")
+def centre_weights(n):
+    """
+    The four centre cells (even n) or the centre and its neighbours (odd n).
+    """
+    weights = np.zeros(n * n)
+    if n % 2 == 0:
+        weights[[r * n + q for r, q in _EVEN_CENTRE_TILES(n)]] = 1
+    else:
+        centre = (n // 2) * n + n // 2
+        weights[[centre, *topology(n).neighbours[centre]]] = 1
+    return weights
+
+
+@cell_kernel("edges_advantage")
+def edges_weights(n):
+    """
+    Cells on any edge of the board.
+    """
+    r, q = np.divmod(np.arange(n * n), n)
+    return ((r == 0) | (r == n - 1) | (q == 0) | (q == n - 1)).astype(float)
+
+
+def plane_size(n):
+    """
+    Length of each plane of board_planes for board size n: the cells,
+    padded to whole bytes.
+    """
+    return (n * n + 7) // 8 * 8
+
+
+def board_planes(tracking_board, player):
+    """
+    The board as an array of bits: one plane for player's tiles, followed
+    by one for their opponent's, each of plane_size(n) with cell r * n + q
+    at index r * n + q. Both planes are unpacked from the bitboard's masks
+    at once.
+    """
+    size = plane_size(tracking_board.n)
+    masks = tracking_board._masks
+    packed = masks[player] | masks[_OPPONENT[player]] << size
+    return np.unpackbits(
+        np.frombuffer(packed.to_bytes(size // 4, "little"), np.uint8),
+        bitorder="little"
+    )
+
+
+class WeightedEvaluation:
+    def __init__(self, weights):
+        """
+        Evaluation function summing the registered kernels named in
+        weights (a dict), each multiplied by its weight. Like the other
+        evaluation functions, it is called with the tracker and the player
+        to evaluate for. Wins and losses found by any of the kernels are
+        returned as they are.
+        """
+        unknown = set(weights) - set(kernel_names())
+        if unknown:
+            raise ValueError(f"unknown evaluation kernels: {sorted(unknown)}")
+        self.weights = dict(weights)
+        self.state_kernels = [
+            (STATE_KERNELS[name], weight) for name, weight in weights.items()
+            if name in STATE_KERNELS and weight
+        ]
+        self.cell_kernels = [
+            (CELL_KERNELS[name], weight) for name, weight in weights.items()
+            if name in CELL_KERNELS and weight
+        ]
+        # combined cell weights, keyed by board size n
+        self._cell_weights = {}
+
+    def cell_weights(self, n):
+        """
+        Weighted sum of the linear kernels' cell weights for board size n,
+        laid out to match board_planes: positive for the player's plane
+        and negative for their opponent's.
+        """
+        combined = self._cell_weights.get(n)
+        if combined is None:
+            weights = np.zeros(plane_size(n))
+            for cell_weights, weight in self.cell_kernels:
+                weights[:n * n] += weight * cell_weights(n)
+            combined = np.concatenate([weights, -weights])
+            self._cell_weights[n] = combined
+        return combined
+
+    def __call__(self, tracking_board, player):
+        value = 0
+        for kernel, weight in self.state_kernels:
+            kernel_value = kernel(tracking_board, player)
+            if kernel_value == _WIN_VALUE or kernel_value == -_WIN_VALUE:
+                return kernel_value
+            value += weight * kernel_value
+        if self.cell_kernels:
+            value += float(board_planes(tracking_board, player) @
+                self.cell_weights(tracking_board.n))
+        return value
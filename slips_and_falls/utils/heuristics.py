@@ -1,13 +1,10 @@
-from slips_and_falls.utils.helper_functions import get_neighbours
-
-_NEIGHBOUR_OFFSETS = (
-    (0, 1),
-    (0, -1),
-    (1, 0),
-    (-1, 0),
-    (1, -1),
-    (-1, 1)
-)
+import numpy as np
+
+from referee.board import _CAPTURE_PATTERNS
+from referee.bitboard import board_tables, bit_indices
+from referee.topology import topology
+from referee.traversal import reachable, components
+
 _OPPONENT = {"red": "blue", "blue": "red", None: None}
 _WIN_VALUE = 1e7
 _EVEN_CENTRE_TILES = lambda n: [
@@ -17,6 +14,9 @@ _EVEN_CENTRE_TILES = lambda n: [
     (n // 2 - 1, n // 2 - 1)
 ]
 
+# Index arrays for evaluating children in bulk, keyed by board size n
+_FRONTIER_TABLES = {}
+
 
 def captures(tracking_board, player):
     return (
@@ -26,45 +26,29 @@ def captures(tracking_board, player):
     )
 
 def longest_edge_branch(tracking_board, player, from_start=True):
+    n = tracking_board.n
     if from_start:
         edge_squares = tracking_board.start_squares[player]
     else:
         edge_squares = tracking_board.end_squares[player]
-    q = [coord for coord in edge_squares if tracking_board[coord] == player]
-    seen = set(q)
+    tiles = tracking_board.tiles[player]
+    starts = [i for i in edge_squares if i in tiles]
+    axis = 0 if player == "red" else 1
     longest = 0
-    while q:
-        coord = q.pop(-1)
-        length = (coord[0] if player == "red" else coord[1]) + 1
-        if not from_start:
-            length = tracking_board.n - length + 1
-        longest = max(longest, length)
-        for neighbour in get_neighbours(coord, tracking_board, player, seen):
-            q.append(neighbour)
+    for i in reachable(n, starts, tiles):
+        height = divmod(i, n)[axis]
+        longest = max(longest, height + 1 if from_start else n - height)
     return longest
 
 def longest_branch(tracking_board, player):
-    seen = set()
+    n = tracking_board.n
     score = 0
-    if player == "red":
-        height = lambda move: move[0]
-    else:
-        height = lambda move: move[1]
-    for tile in tracking_board.tiles[player]:
-        if tile in seen:
-            continue
-        seen.add(tile)
-        q = [tile]
-        max_height = min_height = height(tile) 
-        while q:
-            coord = q.pop(-1)
-            max_height = max(max_height, height(coord))
-            min_height = min(min_height, height(coord))
-            for neighbour in get_neighbours(coord, tracking_board, player, seen):
-                q.append(neighbour)
-        if max_height - min_height == tracking_board.n - 1:
+    axis = 0 if player == "red" else 1
+    for group in components(n, tracking_board.tiles[player]):
+        heights = [divmod(i, n)[axis] for i in group]
+        if max(heights) - min(heights) == n - 1:
             return _WIN_VALUE
-        score = max(score, max_height - min_height + 1)
+        score = max(score, max(heights) - min(heights) + 1)
     return score
 
 def branch_eval(tracking_board, player):
@@ -77,8 +61,10 @@ def branch_eval(tracking_board, player):
     return us - them
 
 def edge_branch_eval(tracking_board, player):
-    us = longest_edge_branch(tracking_board, player, from_start=True)
-    them = longest_edge_branch(tracking_board, _OPPONENT[player], from_start=True)
+    # same as longest_edge_branch, but maintained incrementally by the tracker
+    reach = tracking_board.connectivity.reach
+    us = reach(player, from_start=True)
+    them = reach(_OPPONENT[player], from_start=True)
     if us == tracking_board.n:
         return _WIN_VALUE
     elif them == tracking_board.n:
@@ -86,10 +72,154 @@ def edge_branch_eval(tracking_board, player):
     return (
         us -
         them +
-        longest_edge_branch(tracking_board, player, from_start=False) -
-        longest_edge_branch(tracking_board, _OPPONENT[player], from_start=False)
+        reach(player, from_start=False) -
+        reach(_OPPONENT[player], from_start=False)
     )
 
+def connection_distance(tracking_board, player):
+    """
+    Fewest empty cells player must fill to join their edges (0 once they
+    have), with the opponent's tiles blocked, or None if they are cut off.
+    This is a 0-1 breadth-first search from player's start edge (entering
+    player's tiles costs 0, and empty cells 1), run a layer at a time on
+    bitmasks: each layer holds the cells reachable for one more empty cell.
+    """
+    topo = topology(tracking_board.n)
+    own = tracking_board._masks[player]
+    empty = topo.full & ~(own | tracking_board._masks[_OPPONENT[player]])
+    start, end = topo.start_masks[player], topo.end_masks[player]
+    reached = _closure(topo, start & own, own)
+    distance = 0
+    while not reached & end:
+        layer = (topo.grow(reached) | start) & empty & ~reached
+        if not layer:
+            return None
+        distance += 1
+        reached = _closure(topo, reached | layer, own)
+    return distance
+
+def _closure(topo, cells, own):
+    """
+    cells, along with the tiles in own connected to them through own.
+    """
+    while True:
+        grown = cells | topo.grow(cells) & own
+        if grown == cells:
+            return cells
+        cells = grown
+
+def shortest_path_eval(tracking_board, player):
+    # how many fewer cells player needs to connect than their opponent
+    us = connection_distance(tracking_board, player)
+    them = connection_distance(tracking_board, _OPPONENT[player])
+    if us == 0:
+        return _WIN_VALUE
+    if them == 0:
+        return -_WIN_VALUE
+    # whoever is cut off can't connect before the board fills
+    worst = tracking_board.n ** 2
+    return (worst if them is None else them) - (worst if us is None else us)
+
+def _frontier_tables(n):
+    """
+    Index arrays for board size n: each cell's neighbours, and the cells
+    of each of its capture patterns (opposite cell, then both neighbours),
+    padded (to 6 and 12) with a sentinel node n * n + 2, which is never
+    occupied. Also each cell's row, and column.
+    """
+    tables = _FRONTIER_TABLES.get(n)
+    if tables is None:
+        board = board_tables(n)
+        sentinel = n * n + 2
+        neighbours = np.full((n * n, 6), sentinel)
+        captures = np.full((n * n, len(_CAPTURE_PATTERNS), 3), sentinel)
+        for i, nbrs in enumerate(topology(n).neighbours):
+            neighbours[i, :len(nbrs)] = nbrs
+            for j, (opp_bit, mid_bits) in enumerate(board.captures[i]):
+                captures[i, j] = [opp_bit.bit_length() - 1,
+                    *bit_indices(mid_bits)]
+        heights = np.array(board.coords).T
+        tables = _FRONTIER_TABLES[n] = (neighbours, captures, heights)
+    return tables
+
+def _cells(mask, size):
+    """
+    Bitmask as a boolean array over size nodes.
+    """
+    bits = np.unpackbits(
+        np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), np.uint8),
+        bitorder="little"
+    )
+    return bits[:size].astype(bool)
+
+def edge_branch_capture_children(tracking_board, player, moves):
+    """
+    edge_branch_capture_eval for player after each of player's moves, as
+    an array, found for all moves at once from the current position's
+    union-find groups rather than by making each move. A move joins its
+    neighbouring groups, so its group's extent (and whether it touches
+    either edge) is read off theirs. Moves which capture split the
+    opponent's groups, so they are left as NaN for the caller to
+    evaluate the usual way.
+    """
+    n = tracking_board.n
+    size = n * n + 3
+    neighbours, capture_cells, heights = _frontier_tables(n)
+    connectivity = tracking_board.connectivity
+    opponent = _OPPONENT[player]
+    moves = np.array(moves)
+
+    # roots of player's groups (the forest has no path compression, so
+    # follow parent pointers until they stop changing)
+    mask, parent, low, high = connectivity.forest(player)
+    roots = np.arange(size)
+    roots[:-1] = parent
+    while True:
+        above = roots[roots]
+        if (above == roots).all():
+            break
+        roots = above
+    low = np.array(low + [n])
+    high = np.array(high + [-1])
+    start, end = roots[n * n], roots[n * n + 1]
+
+    # player's stones adjacent to each move, and their groups
+    own = _cells(mask, size)
+    nbrs = neighbours[moves]
+    joined = own[nbrs]
+    nbr_roots = roots[nbrs]
+    height = heights[0 if player == "red" else 1][moves]
+    touches_start = (height == 0) | (joined & (nbr_roots == start)).any(1)
+    touches_end = (height == n - 1) | (joined & (nbr_roots == end)).any(1)
+    group_high = np.maximum(
+        height, np.where(joined, high[nbr_roots], -1).max(1)
+    )
+    group_low = np.minimum(
+        height, np.where(joined, low[nbr_roots], n).min(1)
+    )
+    us_start = high[start] + 1
+    us_end = n - low[end]
+    us_start = np.where(touches_start,
+        np.maximum(us_start, group_high + 1), us_start)
+    us_end = np.where(touches_end, np.maximum(us_end, n - group_low), us_end)
+
+    scores = (
+        us_start - connectivity.reach(opponent, from_start=True) +
+        us_end - connectivity.reach(opponent, from_start=False) +
+        captures(tracking_board, player)
+    ).astype(float)
+    scores[touches_start & touches_end] = _WIN_VALUE
+
+    # moves which capture (with the mover's new stone at the far end of a
+    # pattern whose middle cells are both the opponent's)
+    theirs = _cells(connectivity.forest(opponent)[0], size)
+    cells = capture_cells[moves]
+    captured = (
+        own[cells[:, :, 0]] & theirs[cells[:, :, 1]] & theirs[cells[:, :, 2]]
+    ).any(1)
+    scores[captured] = np.nan
+    return scores
+
 def edge_branch_capture_eval(tracking_board, player):
     edge_branch = edge_branch_eval(tracking_board, player)
     if edge_branch == _WIN_VALUE:
@@ -152,12 +282,11 @@ def centre_advantage(tracking_board, player):
     n = tracking_board.n
     if n % 2 == 0:
         # four pieces in the centre
-        centre = _EVEN_CENTRE_TILES(n)
+        centre_tiles = _EVEN_CENTRE_TILES(n)
     else:
         centre = n // 2, n // 2
-        centre_tiles = [centre]
-        for x, y in _NEIGHBOUR_OFFSETS:
-            centre_tiles.append((centre[0] + x, centre[1] + y))
+        topo = topology(n)
+        centre_tiles = [centre, *topo.neighbour_coords[topo.index[centre]]]
     centre_adv = 0
     for tile in centre_tiles:
         centre_adv += (tracking_board[tile] == player)
@@ -166,23 +295,29 @@ def centre_advantage(tracking_board, player):
 
 def axis_advantage(tracking_board, player):
     score = 0
-    ideal = tracking_board.n - 1
-    for our_tile in tracking_board.tiles[player]:
-        score += (-2 < sum(our_tile) - ideal < 2)
-    for their_tile in tracking_board.tiles[_OPPONENT[player]]:
-        score -= (-2 < sum(their_tile) - ideal < 2)
+    n = tracking_board.n
+    ideal = n - 1
+    tiles = tracking_board.tiles
+    for our_tile in tiles[player]:
+        score += (-2 < sum(divmod(our_tile, n)) - ideal < 2)
+    for their_tile in tiles[_OPPONENT[player]]:
+        score -= (-2 < sum(divmod(their_tile, n)) - ideal < 2)
     return score
 
 def edges_advantage(tracking_board, player):
     score = 0
-    for tile in tracking_board.tiles[player]:
-        num += (
+    n = tracking_board.n
+    tiles = tracking_board.tiles
+    for tile in tiles[player]:
+        tile = divmod(tile, n)
+        score += (
             tile[0] == 0 or 
             tile[0] == tracking_board.n - 1 or
             tile[1] == 0 or 
             tile[1] == tracking_board.n - 1
         )
-    for tile in tracking_board.tiles[_OPPONENT[player]]:
+    for tile in tiles[_OPPONENT[player]]:
+        tile = divmod(tile, n)
         score -= (
             tile[0] == 0 or 
             tile[0] == tracking_board.n - 1 or
@@ -0,0 +1,93 @@
+"""
+Opening books, built offline (see slips_and_falls.utils.book_builder) and
+looked up during play. A book maps the canonical Zobrist key of a position
+(see FinalTracker.tt_key) to the best move found for the player to move,
+as a cell index in the canonical position's frame, or STEAL_INDEX, along
+with the depth (in plies) it was searched to.
+
+Each board size has its own book file, laid out as a fixed header followed
+by three columns: the keys in ascending order (64-bit), and the matching
+moves (16-bit) and search depths (8-bit). Books are memory-mapped rather than read in, so opening one costs
+nothing up front, and a lookup is a binary search over the mapped keys.
+"""
+
+import os
+import mmap
+import struct
+from bisect import bisect_left
+
+# Directory holding the book for each board size n, named <n>.book
+BOOK_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "books")
+
+# Header: magic, format version, board size, number of entries, and the
+# seed the Zobrist tables were built from (keys from other seeds are
+# meaningless)
+_MAGIC = b"SFOB"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHHQQ")
+
+# Move index recorded for the steal action
+STEAL_INDEX = (1 << 16) - 1
+
+# Books opened so far, keyed by board size n (None if unavailable)
+_BOOKS = {}
+
+
+class OpeningBook:
+    def __init__(self, path):
+        """
+        Memory-map the book at path.
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, size, self.seed = _HEADER.unpack_from(
+            self._map
+        )
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not an opening book")
+        columns = memoryview(self._map)[_HEADER.size:]
+        self.keys = columns[:8 * size].cast("Q")
+        self.moves = columns[8 * size:10 * size].cast("H")
+        self.depths = columns[10 * size:11 * size]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, key):
+        """
+        Return the (move, depth) stored for key, or None if key is not in
+        the book.
+        """
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.moves[i], self.depths[i]
+        return None
+
+
+def write_book(path, n, seed, entries):
+    """
+    Write a book for board size n, given a dict of {key: (move, depth)}
+    entries.
+    """
+    keys = sorted(entries)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, n, len(keys), seed))
+        f.write(struct.pack(f"<{len(keys)}Q", *keys))
+        f.write(struct.pack(f"<{len(keys)}H", *(entries[k][0] for k in keys)))
+        f.write(struct.pack(f"<{len(keys)}B", *(entries[k][1] for k in keys)))
+
+
+def load_book(n, seed):
+    """
+    Get the book for board size n (opening it on first use), or None if
+    there is no book for n built with the given Zobrist seed.
+    """
+    if n not in _BOOKS:
+        path = os.path.join(BOOK_DIR, f"{n}.book")
+        book = None
+        if os.path.exists(path):
+            book = OpeningBook(path)
+            if book.n != n or book.seed != seed:
+                book = None
+        _BOOKS[n] = book
+    return _BOOKS[n]
@@ -0,0 +1,159 @@
+"""
+Per-move search statistics, for tuning the engine from real games. If the
+environment variable SLIPS_AND_FALLS_STATS names a file, players search
+with their tracker extended by SearchStats (see TemplatePlayer), which
+appends one JSON object per move to that file. Otherwise the tracker is
+left as it is, so statistics cost nothing unless they are asked for.
+
+Each record holds:
+
+* n, player, ply, and the action chosen,
+* time: seconds taken to choose it,
+* depth: the deepest completed iteration (0 if there was no search, e.g.
+  for book moves),
+* nodes, and evaluations: leaf evaluations, including those of children
+  evaluated together,
+* tt_probes, tt_hits and tt_cutoffs (nodes answered by the transposition
+  table without searching or evaluating anything), and tt_fill_rate,
+* branching_factor: children searched per interior node,
+* first_move_cutoff_rate: the fraction of beta cutoffs caused by the first
+  move searched,
+* time_move_generation, time_evaluation and time_make_unmake: seconds
+  spent ordering moves, evaluating, and making and unmaking moves.
+
+With root-parallel search, nodes include the workers', but the other
+counts and times are only the main process's.
+"""
+
+import os
+import json
+from time import perf_counter as timer
+
+from slips_and_falls.utils.helper_functions import move_to_action
+
+STATS_ENV = "SLIPS_AND_FALLS_STATS"
+
+
+def with_stats(tracker_class):
+    """
+    Subclass of tracker_class (FinalTracker or a subclass of it) which
+    records search statistics.
+    """
+    return type(
+        "Stats" + tracker_class.__name__, (SearchStats, tracker_class), {}
+    )
+
+
+class SearchStats:
+    """
+    Mixin for FinalTracker, counting and timing what search does and
+    writing it out after each move.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_path = os.environ[STATS_ENV]
+        self.reset_stats()
+        evaluate_children = self.evaluate_children
+        if evaluate_children is not None:
+            def timed_children(player, moves):
+                start = timer()
+                values = evaluate_children(player, moves)
+                self.time_evaluation += timer() - start
+                # moves left as NaN are evaluated with evaluation_wrapper
+                self.evaluations_made += int((values == values).sum())
+                return values
+            self.evaluate_children = timed_children
+
+    def reset_stats(self):
+        # children searched so far by each node on the search stack
+        self.frames = []
+        self.evaluations_made = 0
+        self.interior_nodes = self.children_searched = 0
+        self.cutoffs = self.first_move_cutoffs = self.tt_cutoffs = 0
+        self.time_move_generation = 0
+        self.time_evaluation = 0
+        self.time_make_unmake = 0
+
+    def get_transtbl_move(self):
+        self.reset_stats()
+        start = timer()
+        nodes = self.nodes
+        probes, hits = self.transtbl.probes, self.transtbl.hits
+        move = super().get_transtbl_move()
+        elapsed = timer() - start
+        nodes = self.nodes - nodes
+        record = {
+            "n": self.n,
+            "player": self.player,
+            "ply": self.ply,
+            "action": move_to_action(move, self.n),
+            "time": elapsed,
+            "depth": self.depth_reached if nodes else 0,
+            "nodes": nodes,
+            "evaluations": self.evaluations_made,
+            "tt_probes": self.transtbl.probes - probes,
+            "tt_hits": self.transtbl.hits - hits,
+            "tt_cutoffs": self.tt_cutoffs,
+            "tt_fill_rate": self.transtbl.stats()["fill_rate"],
+            "branching_factor": (
+                self.children_searched / self.interior_nodes
+                if self.interior_nodes else 0
+            ),
+            "first_move_cutoff_rate": (
+                self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0
+            ),
+            "time_move_generation": self.time_move_generation,
+            "time_evaluation": self.time_evaluation,
+            "time_make_unmake": self.time_make_unmake,
+        }
+        with open(self.stats_path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+        return move
+
+    def negamax_ab_tt(self, depth, player, alpha, beta):
+        frames = self.frames
+        if frames:
+            frames[-1] += 1
+        frames.append(0)
+        evaluations = self.evaluations_made
+        try:
+            result = super().negamax_ab_tt(depth, player, alpha, beta)
+        finally:
+            children = frames.pop()
+        value = result if depth < self.nm_depth else result[0]
+        if children:
+            self.interior_nodes += 1
+            self.children_searched += children
+            if value >= beta:
+                self.cutoffs += 1
+                self.first_move_cutoffs += children == 1
+        elif self.evaluations_made == evaluations:
+            self.tt_cutoffs += 1
+        return result
+
+    def frontier_values(self, player, moves):
+        self.frames[-1] += len(moves)
+        return super().frontier_values(player, moves)
+
+    def order_moves(self, depth, tt_move):
+        start = timer()
+        moves = super().order_moves(depth, tt_move)
+        self.time_move_generation += timer() - start
+        return moves
+
+    def evaluation_wrapper(self, player):
+        start = timer()
+        value = super().evaluation_wrapper(player)
+        self.time_evaluation += timer() - start
+        self.evaluations_made += 1
+        return value
+
+    def make_move(self, player, move):
+        start = timer()
+        super().make_move(player, move)
+        self.time_make_unmake += timer() - start
+
+    def undo_last_move(self):
+        start = timer()
+        super().undo_last_move()
+        self.time_make_unmake += timer() - start
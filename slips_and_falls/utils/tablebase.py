@@ -0,0 +1,106 @@
+"""
+Endgame tablebases: exact game-theoretic values of every reachable position
+on small boards, solved offline (see slips_and_falls.utils.tablebase_builder).
+
+A position is its red and blue bitboards plus the colour to move, and is
+indexed directly by reading the board as a base 3 number (cell i holds digit
+0, 1 or 2 for empty, red or blue), times two, plus one if red is to move.
+Each entry is a byte holding the value for the player to move (WIN, LOSS,
+DRAW, or UNKNOWN for positions that can't occur) in its top two bits, and
+the best move's cell index (or n * n to steal) in the rest. Winning moves
+are the fastest, and losing moves the slowest, so following the table never
+goes round in circles.
+
+Tables are memory-mapped, so looking a position up is a single indexed read.
+"""
+
+import os
+import mmap
+import struct
+
+from referee.bitboard import bit_indices
+
+# Directory holding the table for each board size n, named <n>.tb
+TABLEBASE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), "tablebases"
+)
+
+# Header: magic, format version, board size
+_MAGIC = b"SFTB"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+
+# Values, for the player to move
+UNKNOWN = 0
+WIN = 1
+LOSS = 2
+DRAW = 3
+_VALUE_SHIFT = 6
+_MOVE_MASK = (1 << _VALUE_SHIFT) - 1
+
+# Tables opened so far, keyed by board size n (None if unavailable)
+_TABLES = {}
+
+
+def ternary_table(n):
+    """
+    Base 3 weight of each bitboard of an n board: the sum of 3^i over its
+    set bits i, indexed by the bitboard itself (so only feasible for
+    small n).
+    """
+    return [sum(3**i for i in bit_indices(mask)) for mask in range(1 << n * n)]
+
+
+def position_index(ternary, red, blue, red_to_move):
+    """
+    Index of a position in the table, given ternary_table(n).
+    """
+    return 2 * (ternary[red] + 2 * ternary[blue]) + red_to_move
+
+
+class Tablebase:
+    def __init__(self, path):
+        """
+        Memory-map the table at path.
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a tablebase")
+        self.entries = memoryview(self._map)[_HEADER.size:]
+        self._ternary = ternary_table(self.n)
+
+    def lookup(self, red, blue, red_to_move):
+        """
+        Return (value, move) for the player to move, or None if the table
+        doesn't cover the position.
+        """
+        entry = self.entries[
+            position_index(self._ternary, red, blue, red_to_move)]
+        if entry >> _VALUE_SHIFT == UNKNOWN:
+            return None
+        return entry >> _VALUE_SHIFT, entry & _MOVE_MASK
+
+
+def write_tablebase(path, n, entries):
+    """
+    Write a table for board size n, given a dict of {index: (value, move)}.
+    """
+    table = bytearray(2 * 3**(n * n))
+    for index, (value, move) in entries.items():
+        table[index] = value << _VALUE_SHIFT | move
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, n))
+        f.write(table)
+
+
+def load_tablebase(n):
+    """
+    Get the table for board size n (opening it on first use), or None if
+    there isn't one.
+    """
+    if n not in _TABLES:
+        path = os.path.join(TABLEBASE_DIR, f"{n}.tb")
+        _TABLES[n] = Tablebase(path) if os.path.exists(path) else None
+    return _TABLES[n]
@@ -0,0 +1,182 @@
+"""
+Solve small boards exactly, by retrograde analysis over every position
+reachable from the start of the game, and write the results as tablebases
+(see slips_and_falls.utils.tablebase).
+
+Positions are generated forwards from the empty board (respecting the rules
+that the first move can't be in the centre, and that blue may steal on its
+first move). Then, working backwards from the positions where the player
+who just moved has won:
+
+* a position is a WIN if some move leads to a LOSS, at one more than the
+  fewest moves to that LOSS,
+* a position is a LOSS once every move leads to a WIN, at one more than
+  the most moves to those WINs.
+
+Captures can repeat positions, so some positions are never resolved this
+way: neither player can force a win, and play goes on until a position
+repeats 7 times (or the turn limit is reached). These are DRAWs.
+
+Positions are solved as if they were being reached for the first time, so
+the table doesn't account for repetitions earlier in the game.
+
+Every position has to be visited, so this is only feasible for n = 3 in
+pure Python (n = 4 has tens of millions of positions).
+
+Usage: python -m slips_and_falls.utils.tablebase_builder [n ...]
+"""
+
+import os
+import sys
+from collections import deque
+from time import perf_counter as timer
+
+from referee.bitboard import board_tables, bit_indices
+from referee.topology import topology
+from slips_and_falls.utils.tablebase import (
+    TABLEBASE_DIR, WIN, LOSS, DRAW, ternary_table, position_index,
+    write_tablebase
+)
+
+_SIZES = [3]
+
+
+def connected(topo, mask, token):
+    """
+    True iff the stones in mask join token's two edges.
+    """
+    reachable = frontier = mask & topo.start_masks[token]
+    while frontier:
+        grown = 0
+        for i in bit_indices(frontier):
+            grown |= topo.neighbour_masks[i]
+        frontier = grown & mask & ~reachable
+        reachable |= frontier
+    return bool(reachable & topo.end_masks[token])
+
+
+def successors(tables, position):
+    """
+    Yield (move, position) for each legal move in a (non-final) position,
+    where move is a cell index, or n * n to steal.
+    """
+    n = tables.n
+    red, blue, red_to_move = position
+    own, opp = (red, blue) if red_to_move else (blue, red)
+    empty = tables.full & ~(red | blue)
+    if not red | blue and n % 2:
+        empty &= ~tables.bits[(n // 2, n // 2)]
+    for i in bit_indices(empty):
+        placed = own | 1 << i
+        captured = 0
+        for opp_bit, mid_bits in tables.captures[i]:
+            if placed & opp_bit and opp & mid_bits == mid_bits:
+                captured |= mid_bits
+        left = opp & ~captured
+        yield i, ((placed, left, False) if red_to_move else
+            (left, placed, True))
+
+    # only blue's first move leaves one red stone and nothing else
+    # (capturing takes at least two stones)
+    if not red_to_move and not blue and red and not red & (red - 1):
+        swapped = 0
+        for i in bit_indices(red):
+            swapped |= tables.transpose[i]
+        yield n * n, (0, swapped, True)
+
+
+def solve(n):
+    """
+    Solve board size n, returning {position: (value, move)} for every
+    reachable position (where move is None in final positions).
+    """
+    tables = board_tables(n)
+    topo = topology(n)
+
+    # generate positions forwards, recording each one's moves and parents
+    start = (0, 0, True)
+    children = {}
+    parents = {start: []}
+    lost = []
+    queue = deque([start])
+    while queue:
+        position = queue.popleft()
+        red, blue, red_to_move = position
+        # the player who just moved may have won
+        just_moved = "blue" if red_to_move else "red"
+        if connected(topo, blue if red_to_move else red, just_moved):
+            children[position] = []
+            lost.append(position)
+            continue
+        children[position] = list(successors(tables, position))
+        for move, child in children[position]:
+            if child not in parents:
+                parents[child] = []
+                queue.append(child)
+            parents[child].append(position)
+
+    # then resolve them backwards, in order of distance from the end
+    distance = {position: 0 for position in lost}
+    value = {position: LOSS for position in lost}
+    unresolved = {position: len(moves) for position, moves in children.items()}
+    queue = deque(lost)
+    while queue:
+        position = queue.popleft()
+        for parent in parents[position]:
+            if parent in value:
+                continue
+            if value[position] == LOSS:
+                value[parent] = WIN
+                distance[parent] = distance[position] + 1
+                queue.append(parent)
+            else:
+                unresolved[parent] -= 1
+                if not unresolved[parent]:
+                    value[parent] = LOSS
+                    distance[parent] = distance[position] + 1
+                    queue.append(parent)
+
+    # best moves: fastest win, slowest loss, or any draw
+    solution = {}
+    for position, moves in children.items():
+        result = value.get(position, DRAW)
+        best = None
+        for move, child in moves:
+            child_result = value.get(child, DRAW)
+            if result == WIN:
+                if child_result == LOSS and (best is None or
+                        distance[child] < distance[best[1]]):
+                    best = (move, child)
+            elif result == LOSS:
+                if best is None or distance[child] > distance[best[1]]:
+                    best = (move, child)
+            elif child_result == DRAW:
+                best = (move, child)
+                break
+        solution[position] = (result, None if best is None else best[0])
+    return solution
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or _SIZES
+    os.makedirs(TABLEBASE_DIR, exist_ok=True)
+    for n in sizes:
+        start = timer()
+        solution = solve(n)
+        ternary = ternary_table(n)
+        entries = {
+            position_index(ternary, *position):
+                (result, 0 if move is None else move)
+            for position, (result, move) in solution.items()
+        }
+        write_tablebase(os.path.join(TABLEBASE_DIR, f"{n}.tb"), n, entries)
+        results = [result for result, _ in solution.values()]
+        first = {WIN: "wins", LOSS: "loses", DRAW: "draws"}[
+            solution[(0, 0, True)][0]]
+        print(f"n={n}: {len(solution)} positions ({results.count(WIN)} "
+            f"wins, {results.count(LOSS)} losses, {results.count(DRAW)} "
+            f"draws), first player {first}, in {timer() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import os
 from slips_and_falls.final_tracker import FinalTracker
 from slips_and_falls.utils.helper_functions import move_to_action
 from slips_and_falls.utils.heuristics import longest_edge_branch
+from slips_and_falls.utils.search_stats import STATS_ENV, with_stats
 from random import randint, seed
 from functools import partial
 from time import perf_counter as timer
@@ -10,16 +12,31 @@ _ACTION_PLACE = "PLACE"
 
 class TemplatePlayer:
     def __init__(self, player, n, ptype: str, pname: str):
-        self.tracking_board = FinalTracker(player, self.evaluate, n)
+        tracker_class = self.tracker_class
+        if os.environ.get(STATS_ENV):
+            tracker_class = with_stats(tracker_class)
+        self.tracking_board = tracker_class(
+            player, self.evaluate, n, pvs=(ptype == "pvs"),
+            workers=(os.cpu_count() if ptype == "parallel" else 0),
+            evaluate_children=self.evaluate_children,
+            prune_intrusions=(ptype == "pruned")
+        )
         self.get_move = self.tracking_board.get_transtbl_move
         self.ptype = ptype
         self.pname = pname
         self.n = n
 
+    # tracker class to search with (subclasses may substitute their own)
+    tracker_class = FinalTracker
+
     # default to random eval, overriden in subclasses
     def evaluate(self, player):
         return randint(0, int(1e6))
 
+    # batch version of evaluate for all of player's moves (see
+    # FinalTracker), if subclasses have one
+    evaluate_children = None
+
     def action(self):
         """
         Called at the beginning of your turn. Based on the current state
@@ -28,7 +45,7 @@ class TemplatePlayer:
         time = timer()
         choice = self.get_move()
         self.tracking_board.total_time += timer() - time
-        return move_to_action(choice)
+        return move_to_action(choice, self.n)
 
     def turn(self, player, action):
         """
@@ -0,0 +1,135 @@
+"""
+Transposition table which persists across moves. The table has a fixed
+number of buckets (a power of two, derived from a memory budget) indexed by
+the low bits of the Zobrist key. Each bucket holds two entries:
+
+* a depth-preferred entry, only replaced by a search at least as deep, or
+  if it is left over from a previous move's search (an older generation),
+* an always-replace entry, which takes anything the first slot rejects.
+
+Entries are stored in three flat, preallocated columns of machine words
+(key, value, and a packed word holding depth, flag, best move and
+generation), rather than as Python objects, so the table's size is fixed
+up front and it creates no garbage for the collector to track.
+
+The columns can be placed in shared memory (inherited by forked worker
+processes). Entries are then written without locks, so the key column
+holds key ^ data ^ value bits: an entry torn by concurrent writes fails
+to match its key, and reads as a miss.
+"""
+
+import mmap
+
+# Memory budget (MB) for the table, kept well under the referee's --space
+_DEFAULT_BUDGET_MB = 8
+
+# Bytes per entry: 64-bit key, 64-bit float value, 64-bit packed data
+_ENTRY_BYTES = 24
+
+# Entry flags: value is exact, a lower bound or an upper bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Layout of the packed data word. Depth and move are stored plus one, so
+# an all-zero word marks an empty slot and move 0 means "no move"
+_DEPTH_MASK = (1 << 8) - 1
+_FLAG_SHIFT = 8
+_MOVE_SHIFT = 10
+_MOVE_MASK = (1 << 16) - 1
+_GEN_SHIFT = 26
+_GEN_MASK = (1 << 16) - 1
+
+
+class TranspositionTable:
+    def __init__(self, budget_mb=_DEFAULT_BUDGET_MB, shared=False):
+        # largest power of two number of buckets (of 2 entries) in budget
+        max_buckets = max(1, int(budget_mb * 2**20) // (2 * _ENTRY_BYTES))
+        self.size = 1 << (max_buckets.bit_length() - 1)
+        self.mask = self.size - 1
+        self.generation = 0
+
+        # bucket i uses slots 2i (depth-preferred) and 2i + 1 (always)
+        column_bytes = 8 * 2 * self.size
+        if shared:
+            # anonymous mappings are shared with forked child processes
+            self._buffer = mmap.mmap(-1, 3 * column_bytes)
+        else:
+            self._buffer = bytearray(3 * column_bytes)
+        columns = memoryview(self._buffer)
+        self.keys = columns[:column_bytes].cast("Q")
+        self.values = columns[column_bytes:2 * column_bytes].cast("d")
+        self.value_bits = columns[column_bytes:2 * column_bytes].cast("Q")
+        self.data = columns[2 * column_bytes:].cast("Q")
+        self.probes = self.hits = 0
+        self.stores = self.collisions = 0
+
+    def new_search(self):
+        """
+        Start a new search: entries from earlier searches become stale
+        (still used, but free to be replaced).
+        """
+        self.generation = (self.generation + 1) & _GEN_MASK
+
+    def probe(self, key):
+        """
+        Return (value, depth, flag, move) stored for key, or None if absent.
+        move is the best move's cell index, or None if not recorded.
+        """
+        self.probes += 1
+        keys, bits = self.keys, self.value_bits
+        slot = (key & self.mask) << 1
+        data = self.data[slot]
+        if not data or keys[slot] ^ data ^ bits[slot] != key:
+            slot += 1
+            data = self.data[slot]
+            if not data or keys[slot] ^ data ^ bits[slot] != key:
+                return None
+        self.hits += 1
+        move = (data >> _MOVE_SHIFT) & _MOVE_MASK
+        return (
+            self.values[slot],
+            (data & _DEPTH_MASK) - 1,
+            (data >> _FLAG_SHIFT) & 3,
+            move - 1 if move else None
+        )
+
+    def store(self, key, value, depth, flag, move=None):
+        """
+        Store a search result for key. move is the best move's cell index
+        (if any).
+        """
+        self.stores += 1
+        keys, bits = self.keys, self.value_bits
+        slot = (key & self.mask) << 1
+        deep = self.data[slot]
+        if (deep and keys[slot] ^ deep ^ bits[slot] != key and
+                depth + 1 < deep & _DEPTH_MASK and
+                deep >> _GEN_SHIFT == self.generation):
+            slot += 1
+        old = self.data[slot]
+        if old and keys[slot] ^ old ^ bits[slot] != key:
+            self.collisions += 1
+        data = (
+            (depth + 1) |
+            (flag << _FLAG_SHIFT) |
+            ((0 if move is None else move + 1) << _MOVE_SHIFT) |
+            (self.generation << _GEN_SHIFT)
+        )
+        self.values[slot] = value
+        self.data[slot] = data
+        keys[slot] = key ^ data ^ bits[slot]
+
+    def stats(self):
+        """
+        Fill rate and probe/collision statistics for the table.
+        """
+        used = sum(map(bool, self.data))
+        return {
+            "entries": len(self.data),
+            "fill_rate": used / len(self.data),
+            "probes": self.probes,
+            "hit_rate": self.hits / self.probes if self.probes else 0,
+            "stores": self.stores,
+            "collisions": self.collisions,
+        }